@@ -0,0 +1,100 @@
+import json
+import os
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from foodgram_backend.sql import normalize
+
+
+class Command(BaseCommand):
+    help = "Summarize the slow query log by query shape"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            default=settings.SLOW_QUERY_LOG,
+            help="Slow query log, rotated copies are read too",
+        )
+        parser.add_argument(
+            "--sort",
+            choices=("total", "count", "max"),
+            default="total",
+            help="Order shapes by total time, count or slowest query",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=10,
+            help="Number of shapes to show",
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Show the plan of the slowest query of each shape",
+        )
+
+    def read(self, path):
+        paths = [path]
+        index = 1
+        while os.path.exists(f"{path}.{index}"):
+            paths.append(f"{path}.{index}")
+            index += 1
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def handle(self, *args, **kwargs):
+        shapes = defaultdict(
+            lambda: {"count": 0, "total": 0.0, "views": set(), "max": None},
+        )
+        for entry in self.read(kwargs["file"]):
+            shape = shapes[normalize(entry["sql"])]
+            shape["count"] += 1
+            shape["total"] += entry["duration_ms"]
+            shape["views"].add(entry["view"] or "-")
+            if (
+                shape["max"] is None
+                or entry["duration_ms"] > shape["max"]["duration_ms"]
+            ):
+                shape["max"] = entry
+        if not shapes:
+            self.stdout.write("No slow queries logged")
+            return
+        order = {
+            "total": lambda item: item[1]["total"],
+            "count": lambda item: item[1]["count"],
+            "max": lambda item: item[1]["max"]["duration_ms"],
+        }[kwargs["sort"]]
+        ranked = sorted(shapes.items(), key=order, reverse=True)
+        for query, shape in ranked[: kwargs["limit"]]:
+            slowest = shape["max"]
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{shape['count']} queries, "
+                    f"total {shape['total']:.1f} ms, "
+                    f"mean {shape['total'] / shape['count']:.1f} ms, "
+                    f"max {slowest['duration_ms']:.1f} ms",
+                ),
+            )
+            self.stdout.write(f"  views: {', '.join(sorted(shape['views']))}")
+            self.stdout.write(f"  {query}")
+            if kwargs["plans"] and slowest["plan"]:
+                self.stdout.write(f"  params: {slowest['params']}")
+                for row in slowest["plan"]:
+                    self.stdout.write(f"    {row}")
+            self.stdout.write("")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(shapes)} query shapes, "
+                f"{sum(shape['count'] for shape in shapes.values())} "
+                "slow queries",
+            ),
+        )
@@ -0,0 +1,104 @@
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+from api.v1.views import RecipeViewSet
+from benchmarks.data import create_dataset
+from recipes.models import Ingredient, RecipeIngredient
+from users.models import User
+
+
+class RecipeRowSerializerTests(TestCase):
+    """RecipeRowSerializer responses match RecipeReadSerializer ones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipe_ids = create_dataset(
+            users=10,
+            recipes=60,
+            ingredients=40,
+            favorites_per_user=8,
+            carts_per_user=4,
+            subscriptions_per_user=3,
+        )
+        cls.user = User.objects.first()
+        User.objects.filter(pk=cls.user.pk).update(
+            avatar="users/avatars/test.png",
+        )
+        cls.token = Token.objects.create(user=cls.user)
+
+    def urls(self):
+        recipe_ids = self.recipe_ids
+        return [
+            "/api/recipes/",
+            "/api/recipes/?limit=100",
+            "/api/recipes/?limit=6&page=3",
+            "/api/recipes/?page=last",
+            "/api/recipes/?tags=tag-1&tags=tag-2&limit=20",
+            f"/api/recipes/?author={self.user.id}",
+            "/api/recipes/?is_favorited=1",
+            "/api/recipes/?is_in_shopping_cart=true&limit=3",
+            "/api/recipes/?is_favorited=0&limit=10",
+            "/api/recipes/?ordering=popular&limit=10",
+            "/api/recipes/?ordering=trending&tags=tag-1&page=2",
+            "/api/recipes/?image_variants=true&limit=5",
+            "/api/recipes/?fields=id,name,image,cooking_time"
+            ",author.first_name,author.last_name",
+            "/api/recipes/?omit=text,ingredients,author.is_subscribed",
+            "/api/recipes/?fields=tags.slug,ingredients,is_favorited"
+            "&omit=ingredients.measurement_unit",
+            "/api/recipes/?fields=author&omit=author.avatar&image_variants=1",
+            "/api/recipes/?fields=image_variants,author.avatar_variants"
+            "&image_variants=1&limit=5",
+            f"/api/recipes/{recipe_ids[0]}/",
+            f"/api/recipes/{recipe_ids[-1]}/?image_variants=1",
+            f"/api/recipes/{recipe_ids[1]}/?fields=name,is_in_shopping_cart",
+            "/api/recipes/999999/",
+        ]
+
+    def get(self, url, fast, **headers):
+        fast_serializer = RecipeViewSet.fast_read_serializer_class
+        if not fast:
+            RecipeViewSet.fast_read_serializer_class = None
+        try:
+            return self.client.get(url, headers=headers)
+        finally:
+            RecipeViewSet.fast_read_serializer_class = fast_serializer
+
+    def test_same_responses(self):
+        for who, headers in (
+            ("anonymous", {}),
+            ("authenticated", {"Authorization": f"Token {self.token.key}"}),
+        ):
+            for url in self.urls():
+                with self.subTest(who=who, url=url):
+                    slow = self.get(url, fast=False, **headers)
+                    fast = self.get(url, fast=True, **headers)
+                    self.assertEqual(slow.status_code, fast.status_code)
+                    self.assertEqual(slow.content, fast.content)
+
+    def test_ingredients_in_entered_order(self):
+        recipe_id = self.recipe_ids[0]
+        first, second = Ingredient.objects.order_by("-id")[:2]
+        RecipeIngredient.objects.filter(recipe_id=recipe_id).delete()
+        for ingredient in (first, second):
+            RecipeIngredient.objects.create(
+                recipe_id=recipe_id,
+                ingredient=ingredient,
+                amount=1,
+            )
+        for url in (
+            f"/api/recipes/{recipe_id}/",
+            "/api/recipes/?limit=100",
+        ):
+            for fast in (False, True):
+                with self.subTest(url=url, fast=fast):
+                    data = self.get(url, fast).json()
+                    recipe = next(
+                        recipe
+                        for recipe in data.get("results", [data])
+                        if recipe["id"] == recipe_id
+                    )
+                    self.assertEqual(
+                        [item["id"] for item in recipe["ingredients"]],
+                        [first.id, second.id],
+                    )
@@ -0,0 +1,320 @@
+"""
+Async versions of the most frequent read endpoints.
+
+They are used instead of the DRF view sets when ASYNC_VIEWS is enabled
+and the application runs under an ASGI server. Only plain JSON reads are
+handled here: pages are read with Django's async ORM and serialized by
+the view set's RecipeRowSerializer in a worker thread, so the output is
+the same; anything else (other methods, parameters outside an explicit
+allowlist, invalid values or credentials, the browsable API) is passed
+to the view set, so errors and rare cases keep a single implementation.
+"""
+
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.fields import BooleanField
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from foodgram_backend.compression import encoded_variants, variant_response
+from foodgram_backend.metrics import record_cache
+from foodgram_backend.middleware import current_timings
+from recipes.models import Ingredient, Recipe
+
+from .authentication import CachedTokenAuthentication
+from .caching import acollection_key
+from .pagination import FoodgramPagination
+from .renderers import ORJSONRenderer
+from .serializers import RecipeRowSerializer
+from .views import IngredientViewSet, RecipeViewSet
+
+JSON_MEDIA_RANGES = {"*/*", "application/*", "application/json"}
+INTEGER = re.compile(r"^-?\d+$")
+BOOLEAN_VALUES = {"1": True, "0": False, "true": True, "false": False}
+# Query parameters the async views implement; requests with any other
+# parameter, e.g. a filter added to RecipeFilter later, fall back.
+RECIPE_PARAMETERS = {
+    "tags",
+    "author",
+    "is_favorited",
+    "is_in_shopping_cart",
+    "page",
+    "limit",
+    "image_variants",
+}
+INGREDIENT_PARAMETERS = {"name"}
+
+recipe_list_view = RecipeViewSet.as_view(
+    {"get": "list", "post": "create"},
+    basename="recipe",
+    detail=False,
+)
+recipe_detail_view = RecipeViewSet.as_view(
+    {
+        "get": "retrieve",
+        "put": "update",
+        "patch": "partial_update",
+        "delete": "destroy",
+    },
+    basename="recipe",
+    detail=True,
+)
+ingredient_list_view = IngredientViewSet.as_view(
+    {"get": "list"},
+    basename="ingredient",
+    detail=False,
+)
+
+
+class Fallback(Exception):
+    """The request has to be handled by the DRF view set."""
+
+
+def _check_json_request(request, parameters):
+    if not set(request.GET) <= parameters:
+        raise Fallback
+    if BooleanField.TRUE_VALUES & set(request.GET.getlist("image_variants")):
+        raise Fallback
+    for media_range in request.headers.get("Accept", "*/*").split(","):
+        media_type, *params = (
+            part.strip() for part in media_range.split(";")
+        )
+        if media_type not in JSON_MEDIA_RANGES or any(
+            not param.startswith("q=") for param in params
+        ):
+            raise Fallback
+
+
+async def _authenticate(request):
+    try:
+        user = await CachedTokenAuthentication().aauthenticate(request)
+    except AuthenticationFailed:
+        raise Fallback
+    # Set like DRF sets it on the wrapped request, serializers read it.
+    request.user = user or AnonymousUser()
+    return request.user
+
+
+def _render(build, *args):
+    """Render ``build(*args)``, timed like DRF serializing and rendering."""
+    timings = current_timings.get()
+    if timings is None:
+        return ORJSONRenderer().render(build(*args))
+    return timings.render(
+        ORJSONRenderer().render,
+        timings.serialize(build, *args),
+    )
+
+
+def _json_response(allow, build, *args):
+    response = HttpResponse(
+        _render(build, *args),
+        content_type="application/json",
+    )
+    response["Allow"] = allow
+    response["Vary"] = "Accept"
+    return response
+
+
+def _recipes(request, user):
+    """Return RecipeRowSerializer rows filtered like RecipeFilter."""
+    queryset = Recipe.objects.values(*RecipeRowSerializer.columns)
+    author = request.GET.get("author")
+    if author:
+        if not INTEGER.match(author):
+            raise Fallback
+        queryset = queryset.filter(author__id=int(author))
+    for name, lookup in (
+        ("is_favorited", "favorites__user"),
+        ("is_in_shopping_cart", "in_carts__user"),
+    ):
+        value = BOOLEAN_VALUES.get(request.GET.get(name, "").lower())
+        if value is None or not user.is_authenticated:
+            continue
+        if value:
+            queryset = queryset.filter(**{lookup: user})
+        else:
+            queryset = queryset.exclude(**{lookup: user})
+    return queryset
+
+
+async def _filter_tags(request, queryset):
+    slugs = request.GET.getlist("tags")
+    if not slugs:
+        return queryset
+    # AllValuesMultipleFilter only accepts slugs of tags in use.
+    choices = {
+        slug
+        async for slug in Recipe.objects.order_by()
+        .values_list("tags__slug", flat=True)
+        .distinct()
+    }
+    if not set(slugs) <= choices:
+        raise Fallback
+    return queryset.filter(tags__slug__in=slugs).distinct()
+
+
+async def _page(request, queryset):
+    """Return the items and links of the page FoodgramPagination returns."""
+    pagination = FoodgramPagination
+    page_size = pagination.page_size
+    limit = request.GET.get(pagination.page_size_query_param)
+    if limit is not None and INTEGER.match(limit) and int(limit) > 0:
+        page_size = int(limit)
+    paginator = Paginator(queryset, page_size)
+    paginator.count = await queryset.acount()
+    number = request.GET.get(pagination.page_query_param, "1")
+    if number in pagination.last_page_strings:
+        number = paginator.num_pages
+    elif not INTEGER.match(number):
+        raise Fallback
+    number = int(number)
+    if number < 1 or (number > paginator.num_pages and number != 1):
+        raise Fallback
+    bottom = (number - 1) * page_size
+    top = min(bottom + page_size, paginator.count)
+    items = [item async for item in queryset[bottom:top]]
+    url = request.build_absolute_uri()
+    next_link = previous_link = None
+    if top < paginator.count:
+        next_link = replace_query_param(
+            url,
+            pagination.page_query_param,
+            number + 1,
+        )
+    if number > 1:
+        previous_link = (
+            remove_query_param(url, pagination.page_query_param)
+            if number == 2
+            else replace_query_param(
+                url,
+                pagination.page_query_param,
+                number - 1,
+            )
+        )
+    return paginator.count, next_link, previous_link, items
+
+
+def _recipe_data(request, recipe):
+    return RecipeRowSerializer(recipe, context={"request": request}).data
+
+
+def _recipe_page_data(request, count, next_link, previous_link, recipes):
+    return {
+        "count": count,
+        "next": next_link,
+        "previous": previous_link,
+        "results": RecipeRowSerializer(
+            recipes,
+            many=True,
+            context={"request": request},
+        ).data,
+    }
+
+
+async def _fallback(view, request, **kwargs):
+    return await sync_to_async(view)(request, **kwargs)
+
+
+@csrf_exempt
+async def recipe_list(request):
+    """Async GET /api/recipes/."""
+    if request.method != "GET":
+        return await _fallback(recipe_list_view, request)
+    try:
+        _check_json_request(request, RECIPE_PARAMETERS)
+        user = await _authenticate(request)
+        queryset = await _filter_tags(request, _recipes(request, user))
+        count, next_link, previous_link, recipes = await _page(
+            request,
+            queryset,
+        )
+    except Fallback:
+        return await _fallback(recipe_list_view, request)
+    return await sync_to_async(_json_response)(
+        "GET, POST, HEAD, OPTIONS",
+        _recipe_page_data,
+        request,
+        count,
+        next_link,
+        previous_link,
+        recipes,
+    )
+
+
+@csrf_exempt
+async def recipe_detail(request, pk):
+    """Async GET /api/recipes/<id>/."""
+    if request.method != "GET":
+        return await _fallback(recipe_detail_view, request, pk=pk)
+    try:
+        _check_json_request(request, RECIPE_PARAMETERS)
+        user = await _authenticate(request)
+        queryset = await _filter_tags(request, _recipes(request, user))
+        recipe = await queryset.filter(pk=pk).afirst()
+        if recipe is None:
+            raise Fallback
+    except Fallback:
+        return await _fallback(recipe_detail_view, request, pk=pk)
+    return await sync_to_async(_json_response)(
+        "GET, PUT, PATCH, DELETE, HEAD, OPTIONS",
+        _recipe_data,
+        request,
+        recipe,
+    )
+
+
+async def _ingredients(request):
+    queryset = Ingredient.objects.all()
+    name = request.GET.get("name")
+    if name:
+        queryset = queryset.filter(name__istartswith=name)
+    return [
+        ingredient
+        async for ingredient in queryset.values(
+            "id",
+            "name",
+            "measurement_unit",
+        )
+    ]
+
+
+@csrf_exempt
+async def ingredient_list(request):
+    """Async GET /api/ingredients/ with the ``name`` prefix search."""
+    if request.method != "GET":
+        return await _fallback(ingredient_list_view, request)
+    try:
+        _check_json_request(request, INGREDIENT_PARAMETERS)
+        await _authenticate(request)
+    except Fallback:
+        return await _fallback(ingredient_list_view, request)
+    timeout = settings.COLLECTION_CACHE_TIMEOUT
+    if not timeout:
+        return _json_response(
+            "GET, HEAD, OPTIONS",
+            list,
+            await _ingredients(request),
+        )
+    # Shares the entries of IngredientViewSet, whose output is the same.
+    key = await acollection_key("ingredient", request)
+    variants = await cache.aget(key)
+    record_cache("collection", variants is not None)
+    if variants is None:
+        variants = encoded_variants(
+            _render(list, await _ingredients(request)),
+            settings.COMPRESSION_MIN_SIZE,
+        )
+        await cache.aset(key, variants, timeout)
+    response = variant_response(request, variants, "application/json")
+    response["Allow"] = "GET, HEAD, OPTIONS"
+    patch_vary_headers(response, ("Accept",))
+    return response
@@ -0,0 +1,83 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+
+from foodgram_backend.metrics import record_cache
+
+CACHE_KEY_PREFIX = "auth-token:"
+
+
+def token_cache_key(key):
+    """Return the cache key of a token without exposing the token."""
+    return CACHE_KEY_PREFIX + hashlib.sha256(key.encode()).hexdigest()
+
+
+def forget_tokens(*keys):
+    """Drop cached authentication results of the given tokens."""
+    cache.delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the token and its user.
+
+    Entries live for TOKEN_CACHE_TIMEOUT seconds and are dropped as soon
+    as the token is deleted (logout, user deletion) or the user is saved
+    (password change, profile update), so authenticated requests served
+    from cache do not query the database.
+    """
+
+    def authenticate_credentials(self, key):
+        timeout = settings.TOKEN_CACHE_TIMEOUT
+        if not timeout:
+            return super().authenticate_credentials(key)
+        cache_key = token_cache_key(key)
+        token = cache.get(cache_key)
+        record_cache("auth_token", token is not None)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, token, timeout)
+            return user, token
+        return token.user, token
+
+    async def aauthenticate(self, request):
+        """
+        Async version of ``authenticate`` for plain Django requests.
+
+        Returns the user, or None when the request has no token.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        timeout = settings.TOKEN_CACHE_TIMEOUT
+        cache_key = token_cache_key(key)
+        if timeout:
+            token = await cache.aget(cache_key)
+            record_cache("auth_token", token is not None)
+            if token is not None:
+                return token.user
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related("user").aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        if timeout:
+            await cache.aset(cache_key, token, timeout)
+        return token.user
@@ -0,0 +1,81 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+
+from foodgram_backend.compression import encoded_variants, variant_response
+from foodgram_backend.metrics import record_cache
+
+CACHE_KEY_PREFIX = "collection:"
+
+
+def _version_key(name):
+    return f"{CACHE_KEY_PREFIX}{name}:version"
+
+
+def _key(name, version, request):
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    digest = hashlib.sha256(query.encode()).hexdigest()
+    return f"{CACHE_KEY_PREFIX}{name}:{version}:{digest}"
+
+
+def collection_key(name, request):
+    """Return the cache key of a collection response to ``request``."""
+    version = cache.get(_version_key(name))
+    if version is None:
+        # A lost version must not bring back entries cached before it.
+        cache.add(_version_key(name), time.time_ns(), None)
+        version = cache.get(_version_key(name))
+    return _key(name, version, request)
+
+
+async def acollection_key(name, request):
+    """Async ``collection_key``."""
+    version = await cache.aget(_version_key(name))
+    if version is None:
+        await cache.aadd(_version_key(name), time.time_ns(), None)
+        version = await cache.aget(_version_key(name))
+    return _key(name, version, request)
+
+
+def forget_collection(name):
+    """Drop every cached response of a collection."""
+    cache.set(_version_key(name), time.time_ns(), None)
+
+
+class CachedCollectionMixin:
+    """
+    Cache the JSON of ``list`` together with its compressed copies.
+
+    Entries live for COLLECTION_CACHE_TIMEOUT seconds per query string
+    and are dropped by ``forget_collection(basename)`` on every change of
+    the listed model. Compressed copies are made once per entry with the
+    highest levels and sent to clients accepting them, so cached
+    responses are not compressed again per request.
+    """
+
+    def list(self, request, *args, **kwargs):
+        timeout = settings.COLLECTION_CACHE_TIMEOUT
+        renderer = request.accepted_renderer
+        if not timeout or renderer.format != "json":
+            return super().list(request, *args, **kwargs)
+        key = collection_key(self.basename, request)
+        variants = cache.get(key)
+        record_cache("collection", variants is not None)
+        if variants is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            variants = encoded_variants(
+                renderer.render(
+                    response.data,
+                    request.accepted_media_type,
+                    self.get_renderer_context(),
+                ),
+                settings.COMPRESSION_MIN_SIZE,
+            )
+            cache.set(key, variants, timeout)
+        return variant_response(request, variants, renderer.media_type)
@@ -1 +1,2 @@
 PAGE_SIZE = 10
+BULK_RECIPES_LIMIT = 100
@@ -0,0 +1,64 @@
+import posixpath
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import ImageField
+from rest_framework.relations import PrimaryKeyRelatedField
+
+
+class PrimaryKeyField(PrimaryKeyRelatedField):
+    """
+    Primary key field that defers the object lookup to the parent.
+
+    Only the type of the value is checked here, so a list of these fields
+    does not run one query per item. The parent serializer resolves all
+    collected keys at once with ``resolve``.
+    """
+
+    def to_internal_value(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+    def resolve(self, pks):
+        """Return a mapping of primary key to object using one query."""
+        return self.get_queryset().in_bulk(set(pks))
+
+    def does_not_exist(self, pk):
+        """Return the error message for a primary key with no object."""
+        return self.error_messages["does_not_exist"].format(pk_value=pk)
+
+
+class ImageUploadField(Base64ImageField):
+    """
+    Image field accepting a base64 string or a multipart file upload.
+
+    Uploaded files get the same random names as decoded base64 images.
+    Both forms are limited to MAX_UPLOAD_SIZE bytes.
+    """
+
+    TOO_LARGE_MESSAGE = "Uploaded image is too large."
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            extension = posixpath.splitext(data.name)[1][1:].lower()
+            if extension not in self.ALLOWED_TYPES:
+                raise ValidationError(self.INVALID_TYPE_MESSAGE)
+            if data.size > settings.MAX_UPLOAD_SIZE:
+                raise ValidationError(self.TOO_LARGE_MESSAGE)
+            data.name = f"{self.get_file_name(data)}.{extension}"
+            return ImageField.to_internal_value(self, data)
+        if (
+            isinstance(data, str)
+            and len(data) * 3 // 4 > settings.MAX_UPLOAD_SIZE
+        ):
+            raise ValidationError(self.TOO_LARGE_MESSAGE)
+        return super().to_internal_value(data)
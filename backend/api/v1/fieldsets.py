@@ -0,0 +1,131 @@
+from functools import cached_property
+
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _parse(values):
+    tree = {}
+    for value in values:
+        for path in value.split(","):
+            names = [name.strip() for name in path.split(".")]
+            if not all(names):
+                continue
+            node = tree
+            for name in names[:-1]:
+                node = node.setdefault(name, {})
+                if node is None:
+                    break
+            else:
+                node[names[-1]] = None
+    return tree or None
+
+
+class Fieldset:
+    """
+    Fields kept by the ``fields`` and ``omit`` query parameters.
+
+    Both take comma separated field names, nested fields are addressed
+    with dots: ``fields=id,name,author.username`` keeps only the listed
+    fields and ``omit=text,author.is_subscribed`` drops them. A field
+    that is listed and omitted is dropped, unknown names are ignored.
+    Trees map a name to None for the whole field or to a nested tree.
+    """
+
+    def __init__(self, fields=None, omit=None):
+        self.fields = fields
+        self.omit = omit
+
+    @classmethod
+    def from_query_params(cls, query_params):
+        return cls(
+            _parse(query_params.getlist("fields")),
+            _parse(query_params.getlist("omit")),
+        )
+
+    def __bool__(self):
+        return self.fields is not None or bool(self.omit)
+
+    def includes(self, path):
+        """Whether the field at the dotted ``path`` is kept."""
+        fieldset = self
+        *parents, name = path.split(".")
+        for parent in parents:
+            if not fieldset.includes(parent):
+                return False
+            fieldset = fieldset.nested(parent)
+        if fieldset.fields is not None and name not in fieldset.fields:
+            return False
+        return not (
+            fieldset.omit
+            and name in fieldset.omit
+            and fieldset.omit[name] is None
+        )
+
+    def nested(self, name):
+        """Return the fieldset of the fields of the field ``name``."""
+        return Fieldset(
+            None if self.fields is None else self.fields.get(name),
+            self.omit.get(name) if self.omit else None,
+        )
+
+    def prune(self, data):
+        """Return ``data`` without the keys of dropped fields."""
+        if not self:
+            return data
+        return {
+            key: value for key, value in data.items() if self.includes(key)
+        }
+
+
+def serializer_fieldset(serializer):
+    """
+    Return the fieldset of ``serializer`` from its context.
+
+    The fieldset of the root serializer is stored under ``fieldset``,
+    nested serializers get the part for their position in the tree.
+    """
+    fieldset = serializer.context.get("fieldset") or Fieldset()
+    if not fieldset:
+        return fieldset
+    names = []
+    node = serializer
+    while node.parent is not None:
+        if node.field_name:
+            names.append(node.field_name)
+        node = node.parent
+    for name in reversed(names):
+        fieldset = fieldset.nested(name)
+    return fieldset
+
+
+class SparseFieldsMixin:
+    """Drop the fields of a read serializer its fieldset does not keep."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = serializer_fieldset(self)
+        if fieldset:
+            for field_name in list(fields):
+                if not fieldset.includes(field_name):
+                    del fields[field_name]
+        return fields
+
+
+class SparseFieldsViewMixin:
+    """
+    Pass the fieldset of the query string to serializers.
+
+    Only reads are pruned, so ``fields`` and ``omit`` never change which
+    fields a write accepts.
+    """
+
+    @cached_property
+    def fieldset(self):
+        if self.request.method not in SAFE_METHODS:
+            return Fieldset()
+        return Fieldset.from_query_params(self.request.query_params)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fieldset"] = self.fieldset
+        return context
@@ -0,0 +1,75 @@
+import json
+
+from django.conf import settings
+from django.utils.datastructures import MultiValueDict
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import DataAndFiles, JSONParser, MultiPartParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(content):
+    """Parse JSON ``str`` or UTF-8 ``bytes`` with orjson if installed."""
+    if orjson is None:
+        return json.loads(content)
+    return orjson.loads(content)
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser using orjson when installed, the stdlib ``json`` if not."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            content = stream.read()
+            if encoding.lower() not in ("utf-8", "utf8"):
+                content = content.decode(encoding)
+            return orjson.loads(content)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class JSONFormData(dict):
+    """
+    Parsed JSON object that merges uploaded files by their last value.
+
+    ``Request`` adds files to the data with ``copy()`` and ``update()``;
+    a plain dict would store the lists of a ``MultiValueDict`` instead.
+    """
+
+    def copy(self):
+        return type(self)(self)
+
+    def update(self, other=(), **kwargs):
+        if isinstance(other, MultiValueDict):
+            other = other.items()
+        super().update(other, **kwargs)
+
+
+class MultiPartJSONParser(MultiPartParser):
+    """
+    Multipart parser for JSON payloads with files uploaded alongside.
+
+    The JSON body goes into the ``data`` part and files into parts named
+    after the serializer fields, e.g. ``image`` or ``avatar``. Files are
+    streamed to disk in chunks by the upload handlers instead of being
+    embedded in the JSON as base64 strings.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        result = super().parse(stream, media_type, parser_context)
+        if "data" not in result.data:
+            return result
+        try:
+            data = loads(result.data["data"])
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+        if not isinstance(data, dict):
+            raise ParseError("JSON parse error - data must be an object.")
+        return DataAndFiles(JSONFormData(data), result.files)
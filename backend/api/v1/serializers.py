@@ -1,22 +1,34 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
-from drf_extra_fields.fields import Base64ImageField
+from django.db import transaction
 # from rest_framework import status
 
 from rest_framework.exceptions import ValidationError
 from rest_framework.fields import (
+    BooleanField,
     CharField,
     IntegerField,
+    ListField,
     SerializerMethodField,
 )
-from rest_framework.relations import PrimaryKeyRelatedField
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import (
+    BaseSerializer,
+    ListSerializer,
+    ModelSerializer,
+    Serializer,
+)
 
 from favorites.models import Favorite
+from recipes.images import variant_urls
 from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
 # from rest_framework_simplejwt.exceptions import AuthenticationFailed
 # from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from shopping_lists.models import ShoppingCart
 from subscriptions.models import Subscription
+from .constants import BULK_RECIPES_LIMIT
+from .fields import ImageUploadField, PrimaryKeyField
+from .fieldsets import SparseFieldsMixin, serializer_fieldset
 
 User = get_user_model()
 
@@ -31,11 +43,43 @@ User = get_user_model()
 #             )
 #         return {"auth_token": data["access"]}
 
-class UserSerializer(ModelSerializer):
+def variants_requested(context):
+    """Whether the request in ``context`` asks for image variant URLs."""
+    request = context.get("request")
+    query_params = getattr(request, "query_params", {})
+    return query_params.get("image_variants") in BooleanField.TRUE_VALUES
+
+
+class ImageVariantsMixin:
+    """
+    Include resized image variant URLs only on request.
+
+    Fields listed in ``variant_fields`` are dropped unless the query string
+    contains ``image_variants=true``.
+    """
+
+    variant_fields = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not variants_requested(self.context):
+            for field_name in self.variant_fields:
+                fields.pop(field_name, None)
+        return fields
+
+
+class UserSerializer(
+    SparseFieldsMixin,
+    ImageVariantsMixin,
+    ModelSerializer,
+):
     """Serializer for user model."""
 
     is_subscribed = SerializerMethodField()
     avatar = SerializerMethodField()
+    avatar_variants = SerializerMethodField()
+
+    variant_fields = ("avatar_variants",)
 
     class Meta:
         model = User
@@ -48,6 +92,7 @@ class UserSerializer(ModelSerializer):
             "password",
             "is_subscribed",
             "avatar",
+            "avatar_variants",
         )
         extra_kwargs = {"password": {"write_only": True}}
 
@@ -73,6 +118,10 @@ class UserSerializer(ModelSerializer):
             return obj.avatar.url
         return None
 
+    def get_avatar_variants(self, obj):
+        """Get the URLs of the resized versions of the user's avatar."""
+        return variant_urls(obj.avatar)
+
 
 class UserWithRecipesSerializer(UserSerializer):
     """Serializer for users with their recipes."""
@@ -99,7 +148,14 @@ class UserWithRecipesSerializer(UserSerializer):
                 recipes = recipes[:recipes_limit]
             except ValueError:
                 pass
-        return RecipeMinifiedSerializer(recipes, many=True).data
+        return RecipeMinifiedSerializer(
+            recipes,
+            many=True,
+            context={
+                **self.context,
+                "fieldset": serializer_fieldset(self).nested("recipes"),
+            },
+        ).data
 
     def get_recipes_count(self, obj):
         """Get the count of recipes authored by the given user."""
@@ -109,7 +165,7 @@ class UserWithRecipesSerializer(UserSerializer):
 class AvatarSerializer(ModelSerializer):
     """Serializer for user avatar."""
 
-    avatar = Base64ImageField()
+    avatar = ImageUploadField()
 
     class Meta:
         model = User
@@ -155,7 +211,7 @@ class SubscriptionSerializer(ModelSerializer):
         return author_data
 
 
-class TagSerializer(ModelSerializer):
+class TagSerializer(SparseFieldsMixin, ModelSerializer):
     """Serializer for tags."""
 
     class Meta:
@@ -163,7 +219,10 @@ class TagSerializer(ModelSerializer):
         fields = ("id", "name", "slug")
 
 
-class IngredientInRecipeReadSerializer(ModelSerializer):
+class IngredientInRecipeReadSerializer(
+    SparseFieldsMixin,
+    ModelSerializer,
+):
     """Serializer for reading ingredients in a recipe."""
 
     id = IntegerField(source="ingredient.id")
@@ -182,7 +241,7 @@ class IngredientInRecipeReadSerializer(ModelSerializer):
 class IngredientInRecipeWriteSerializer(ModelSerializer):
     """Serializer for writing ingredients in a recipe."""
 
-    id = PrimaryKeyRelatedField(
+    id = PrimaryKeyField(
         queryset=Ingredient.objects.all(),
         source="ingredient",
     )
@@ -192,11 +251,16 @@ class IngredientInRecipeWriteSerializer(ModelSerializer):
         fields = ("id", "amount")
 
 
-class RecipeReadSerializer(ModelSerializer):
+class RecipeReadSerializer(
+    SparseFieldsMixin,
+    ImageVariantsMixin,
+    ModelSerializer,
+):
     """Serializer for reading recipes."""
 
     is_favorited = SerializerMethodField()
     is_in_shopping_cart = SerializerMethodField()
+    image_variants = SerializerMethodField()
     ingredients = IngredientInRecipeReadSerializer(
         many=True,
         source="recipeingredient_set",
@@ -204,6 +268,8 @@ class RecipeReadSerializer(ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = UserSerializer(read_only=True)
 
+    variant_fields = ("image_variants",)
+
     class Meta:
         model = Recipe
         fields = (
@@ -215,10 +281,15 @@ class RecipeReadSerializer(ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_variants",
             "text",
             "cooking_time",
         )
 
+    def get_image_variants(self, obj):
+        """Get the URLs of the resized versions of the recipe image."""
+        return variant_urls(obj.image)
+
     def get_is_favorited(self, obj):
         """Check if the recipe is favorited by the authenticated user."""
         request = self.context.get("request")
@@ -242,8 +313,8 @@ class RecipeWriteSerializer(ModelSerializer):
     """Serializer for writing recipes."""
 
     ingredients = IngredientInRecipeWriteSerializer(many=True, write_only=True)
-    image = Base64ImageField()
-    tags = PrimaryKeyRelatedField(queryset=Tag.objects.all(), many=True)
+    image = ImageUploadField()
+    tags = PrimaryKeyField(queryset=Tag.objects.all(), many=True)
 
     class Meta:
         model = Recipe
@@ -259,6 +330,39 @@ class RecipeWriteSerializer(ModelSerializer):
         )
         read_only_fields = ("author",)
 
+    def validate_ingredients(self, value):
+        """Resolve ingredient ids of all lines with a single query."""
+        field = self.fields["ingredients"].child.fields["id"]
+        ingredients = field.resolve(
+            ingredient_data["ingredient"] for ingredient_data in value
+        )
+        errors = [
+            {}
+            if pk in ingredients
+            else {"id": [field.does_not_exist(pk)]}
+            for pk in (
+                ingredient_data["ingredient"] for ingredient_data in value
+            )
+        ]
+        if any(errors):
+            raise ValidationError(errors)
+        for ingredient_data in value:
+            ingredient_data["ingredient"] = ingredients[
+                ingredient_data["ingredient"]
+            ]
+        return value
+
+    def validate_tags(self, value):
+        """Resolve tag ids with a single query."""
+        field = self.fields["tags"].child_relation
+        tags = field.resolve(value)
+        missing = [pk for pk in value if pk not in tags]
+        if missing:
+            raise ValidationError(
+                [field.does_not_exist(pk) for pk in missing],
+            )
+        return [tags[pk] for pk in value]
+
     def validate(self, data):
         """Validate the entire payload."""
         ingredients = data.get("ingredients")
@@ -303,6 +407,48 @@ class RecipeWriteSerializer(ModelSerializer):
         ]
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
 
+    def _update_recipe_ingredients(self, recipe, ingredients_data):
+        """
+        Bring RecipeIngredient rows of the recipe in line with the payload.
+
+        Only the difference is written: new ingredients are inserted,
+        changed amounts are updated and missing ingredients are deleted,
+        so untouched rows keep their ids.
+        """
+        existing = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in recipe.recipeingredient_set.all()
+        }
+        to_create = []
+        to_update = []
+        for ingredient_data in ingredients_data:
+            ingredient = ingredient_data["ingredient"]
+            amount = ingredient_data["amount"]
+            recipe_ingredient = existing.pop(ingredient.id, None)
+            if recipe_ingredient is None:
+                to_create.append(
+                    RecipeIngredient(
+                        recipe=recipe,
+                        ingredient=ingredient,
+                        amount=amount,
+                    ),
+                )
+            elif recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                to_update.append(recipe_ingredient)
+        if existing:
+            RecipeIngredient.objects.filter(
+                pk__in=[
+                    recipe_ingredient.pk
+                    for recipe_ingredient in existing.values()
+                ],
+            ).delete()
+        if to_update:
+            RecipeIngredient.objects.bulk_update(to_update, ("amount",))
+        if to_create:
+            RecipeIngredient.objects.bulk_create(to_create)
+
+    @transaction.atomic
     def create(self, validated_data):
         """Create a new recipe."""
         ingredients_data = validated_data.pop("ingredients")
@@ -316,15 +462,16 @@ class RecipeWriteSerializer(ModelSerializer):
         self._create_recipe_ingredients(recipe, ingredients_data)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update an existing recipe."""
         ingredients_data = validated_data.pop("ingredients", None)
         tags = validated_data.pop("tags", None)
         instance = super().update(instance, validated_data)
-        instance.tags.set(tags)
-        instance.ingredients.clear()
-
-        self._create_recipe_ingredients(instance, ingredients_data)
+        if tags is not None:
+            instance.tags.set(tags)
+        if ingredients_data is not None:
+            self._update_recipe_ingredients(instance, ingredients_data)
 
         return instance
 
@@ -342,12 +489,24 @@ class IngredientSerializer(ModelSerializer):
         fields = ("id", "name", "measurement_unit")
 
 
-class RecipeMinifiedSerializer(ModelSerializer):
+class RecipeMinifiedSerializer(
+    SparseFieldsMixin,
+    ImageVariantsMixin,
+    ModelSerializer,
+):
     """Serializer for a minified version of recipes."""
 
+    image_variants = SerializerMethodField()
+
+    variant_fields = ("image_variants",)
+
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "image_variants", "cooking_time")
+
+    def get_image_variants(self, obj):
+        """Get the URLs of the resized versions of the recipe image."""
+        return variant_urls(obj.image)
 
 
 class FavoriteSerializer(ModelSerializer):
@@ -400,3 +559,235 @@ class ShoppingCartSerializer(ModelSerializer):
             context=self.context,
         ).data
         return recipe_data
+
+
+class RecipeIdsSerializer(Serializer):
+    """Serializer for the recipe ids of bulk favorite and cart changes."""
+
+    recipes = ListField(
+        child=IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_RECIPES_LIMIT,
+    )
+
+    def validate_recipes(self, value):
+        """Drop repeated ids, keeping the first occurrence."""
+        return list(dict.fromkeys(value))
+
+
+def _field_file(model, field_name, name):
+    """Return the field file of a stored file name, like model instances."""
+    field = model._meta.get_field(field_name)
+    return field.attr_class(None, field, name)
+
+
+class RecipeRowListSerializer(ListSerializer):
+    def to_representation(self, data):
+        return self.child.to_representation_many(list(data))
+
+
+class RecipeRowSerializer(BaseSerializer):
+    """
+    Read-only ``RecipeReadSerializer`` for ``.values(*columns)`` rows.
+
+    Produces the same data without DRF fields: tags, ingredients and the
+    user's favorites, shopping cart and subscriptions of a whole page are
+    fetched with one query each and the dicts are built directly. Queries
+    and columns of fields dropped by the fieldset are skipped.
+    """
+
+    columns = (
+        "id",
+        "name",
+        "image",
+        "text",
+        "cooking_time",
+        "author_id",
+        "author__email",
+        "author__username",
+        "author__first_name",
+        "author__last_name",
+        "author__avatar",
+    )
+    # Fields each column is read for, the id is always read.
+    column_fields = {
+        "name": ("name",),
+        "image": ("image", "image_variants"),
+        "text": ("text",),
+        "cooking_time": ("cooking_time",),
+        "author_id": ("author.id", "author.is_subscribed"),
+        "author__email": ("author.email",),
+        "author__username": ("author.username",),
+        "author__first_name": ("author.first_name",),
+        "author__last_name": ("author.last_name",),
+        "author__avatar": ("author.avatar", "author.avatar_variants"),
+    }
+    author_columns = (
+        ("id", "author_id"),
+        ("email", "author__email"),
+        ("username", "author__username"),
+        ("first_name", "author__first_name"),
+        ("last_name", "author__last_name"),
+    )
+
+    class Meta:
+        list_serializer_class = RecipeRowListSerializer
+
+    @classmethod
+    def selected_columns(cls, fieldset):
+        """Return the columns read for the fields kept by ``fieldset``."""
+        return tuple(
+            column
+            for column in cls.columns
+            if column not in cls.column_fields
+            or any(map(fieldset.includes, cls.column_fields[column]))
+        )
+
+    def to_representation(self, instance):
+        return self.to_representation_many([instance])[0]
+
+    def to_representation_many(self, rows):
+        """Return the representations of a list of rows."""
+        request = self.context.get("request")
+        user = getattr(request, "user", None)
+        authenticated = user is not None and user.is_authenticated
+        variants = variants_requested(self.context)
+        fieldset = serializer_fieldset(self)
+        keep = {
+            name: fieldset.includes(name)
+            for name in (
+                "id",
+                "tags",
+                "author",
+                "ingredients",
+                "is_favorited",
+                "is_in_shopping_cart",
+                "name",
+                "image",
+                "image_variants",
+                "text",
+                "cooking_time",
+            )
+        }
+        keep["image_variants"] &= variants
+        recipe_ids = [row["id"] for row in rows]
+        tags = defaultdict(list)
+        if keep["tags"]:
+            tag_fieldset = fieldset.nested("tags")
+            for recipe_id, tag_id, name, slug in (
+                Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+                .order_by("recipe_id", "tag_id")
+                .values_list("recipe_id", "tag_id", "tag__name", "tag__slug")
+            ):
+                tags[recipe_id].append(
+                    tag_fieldset.prune(
+                        {"id": tag_id, "name": name, "slug": slug},
+                    ),
+                )
+        ingredients = defaultdict(list)
+        if keep["ingredients"]:
+            ingredient_fieldset = fieldset.nested("ingredients")
+            for recipe_id, ingredient_id, name, unit, amount in (
+                RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+                .order_by("recipe_id", "id")
+                .values_list(
+                    "recipe_id",
+                    "ingredient_id",
+                    "ingredient__name",
+                    "ingredient__measurement_unit",
+                    "amount",
+                )
+            ):
+                ingredients[recipe_id].append(
+                    ingredient_fieldset.prune(
+                        {
+                            "id": ingredient_id,
+                            "name": name,
+                            "measurement_unit": unit,
+                            "amount": amount,
+                        },
+                    ),
+                )
+        favorited = in_cart = subscribed = frozenset()
+        if authenticated and keep["is_favorited"]:
+            favorited = set(
+                Favorite.objects.filter(
+                    user=user,
+                    recipe_id__in=recipe_ids,
+                ).values_list("recipe_id", flat=True),
+            )
+        if authenticated and keep["is_in_shopping_cart"]:
+            in_cart = set(
+                ShoppingCart.objects.filter(
+                    user=user,
+                    recipe_id__in=recipe_ids,
+                ).values_list("recipe_id", flat=True),
+            )
+        author_fieldset = fieldset.nested("author")
+        if (
+            authenticated
+            and keep["author"]
+            and author_fieldset.includes("is_subscribed")
+        ):
+            subscribed = set(
+                Subscription.objects.filter(
+                    user=user,
+                    author_id__in={row["author_id"] for row in rows},
+                ).values_list("author_id", flat=True),
+            )
+        representations = []
+        for row in rows:
+            data = {}
+            if keep["id"]:
+                data["id"] = row["id"]
+            if keep["tags"]:
+                data["tags"] = tags[row["id"]]
+            if keep["author"]:
+                data["author"] = self._author(
+                    row,
+                    subscribed,
+                    variants,
+                    author_fieldset,
+                )
+            if keep["ingredients"]:
+                data["ingredients"] = ingredients[row["id"]]
+            if keep["is_favorited"]:
+                data["is_favorited"] = row["id"] in favorited
+            if keep["is_in_shopping_cart"]:
+                data["is_in_shopping_cart"] = row["id"] in in_cart
+            if keep["name"]:
+                data["name"] = row["name"]
+            if keep["image"] or keep["image_variants"]:
+                image = _field_file(Recipe, "image", row["image"])
+            if keep["image"]:
+                image_url = None
+                if image:
+                    image_url = image.url
+                    if request is not None:
+                        image_url = request.build_absolute_uri(image_url)
+                data["image"] = image_url
+            if keep["image_variants"]:
+                data["image_variants"] = variant_urls(image)
+            if keep["text"]:
+                data["text"] = row["text"]
+            if keep["cooking_time"]:
+                data["cooking_time"] = row["cooking_time"]
+            representations.append(data)
+        return representations
+
+    def _author(self, row, subscribed, variants, fieldset):
+        author = {
+            name: row[column]
+            for name, column in self.author_columns
+            if fieldset.includes(name)
+        }
+        if fieldset.includes("is_subscribed"):
+            author["is_subscribed"] = row["author_id"] in subscribed
+        avatar_variants = variants and fieldset.includes("avatar_variants")
+        if fieldset.includes("avatar") or avatar_variants:
+            avatar = _field_file(User, "avatar", row["author__avatar"])
+        if fieldset.includes("avatar"):
+            author["avatar"] = avatar.url if avatar else None
+        if avatar_variants:
+            author["avatar_variants"] = variant_urls(avatar)
+        return author
@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Tag
+from .authentication import forget_tokens
+from .caching import forget_collection
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """Stop accepting a cached token after logout or user deletion."""
+    forget_tokens(instance.key)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created, update_fields, **kwargs):
+    """Drop cached copies of a user whose data has changed."""
+    if created or update_fields == frozenset(("last_login",)):
+        return
+    forget_tokens(
+        *Token.objects.filter(user_id=instance.pk).values_list(
+            "key",
+            flat=True,
+        ),
+    )
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def forget_tags(sender, **kwargs):
+    """Drop cached tag lists after a tag changes."""
+    forget_collection("tag")
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def forget_ingredients(sender, **kwargs):
+    """Drop cached ingredient lists after an ingredient changes."""
+    forget_collection("ingredient")
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "Uploaded file is too large."
+    default_code = "upload_too_large"
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    """
+    Enforce MAX_UPLOAD_SIZE while a multipart body is being read.
+
+    Requests declaring a larger body are rejected before reading, and a
+    file is rejected as soon as its received chunks exceed the limit, so
+    oversized uploads never reach the disk in full. Chunks are passed on
+    unchanged to the next handler.
+    """
+
+    def handle_raw_input(
+        self,
+        input_data,
+        META,
+        content_length,
+        boundary,
+        encoding=None,
+    ):
+        limit = settings.MAX_UPLOAD_SIZE + settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        if content_length and content_length > limit:
+            raise UploadTooLarge
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.MAX_UPLOAD_SIZE:
+            raise UploadTooLarge
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from foodgram_backend.settings import MEDIA_ROOT, MEDIA_URL
 
+from . import async_views
 from .views import (
     IngredientViewSet,
     RecipeViewSet,
@@ -18,7 +20,13 @@ router.register("tags", TagViewSet, basename="tag")
 router.register("recipes", RecipeViewSet, basename="recipe")
 router.register("ingredients", IngredientViewSet, basename="ingredient")
 
-urlpatterns = [
+async_urlpatterns = [
+    path("recipes/", async_views.recipe_list),
+    path("recipes/<int:pk>/", async_views.recipe_detail),
+    path("ingredients/", async_views.ingredient_list),
+]
+
+urlpatterns = (async_urlpatterns if settings.ASYNC_VIEWS else []) + [
     path("", include(router.urls)),
     # path("auth/token/login/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"),
     # path("auth/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
@@ -2,7 +2,8 @@ import os
 from io import BytesIO
 
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Sum
 from django.http import HttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
@@ -23,19 +24,30 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
+from favorites.models import Favorite
 from foodgram_backend import settings
-from recipes.models import Ingredient, Recipe, Tag
+from foodgram_backend.middleware import (
+    SerializerTimingMixin,
+    timed_serializer,
+)
+from recipes import rankings
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
 # from rest_framework_simplejwt.views import TokenObtainPairView
 from shopping_lists.models import ShoppingCart
 from subscriptions.models import Subscription
+from .caching import CachedCollectionMixin
+from .fieldsets import SparseFieldsViewMixin
 from .filters import IngredientFilter, RecipeFilter
 from .pagination import FoodgramPagination
+from .parsers import MultiPartJSONParser, ORJSONParser
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (
     AvatarSerializer,
     FavoriteSerializer,
     IngredientSerializer,
+    RecipeIdsSerializer,
     RecipeReadSerializer,
+    RecipeRowSerializer,
     RecipeWriteSerializer,
     ShoppingCartSerializer,
     SubscriptionSerializer,
@@ -52,7 +64,11 @@ pdfmetrics.registerFont(TTFont("DejaVuSans", font_path))
 # class CustomTokenObtainPairView(TokenObtainPairView):
 #     serializer_class = CustomTokenObtainPairSerializer
 
-class UserViewSet(UserViewSet):
+class UserViewSet(
+    SerializerTimingMixin,
+    SparseFieldsViewMixin,
+    UserViewSet,
+):
     """View set for user-related actions."""
 
     serializer_class = UserSerializer
@@ -74,6 +90,7 @@ class UserViewSet(UserViewSet):
         detail=False,
         permission_classes=(IsAuthenticated,),
         serializer_class=AvatarSerializer,
+        parser_classes=(ORJSONParser, MultiPartJSONParser),
         url_path="me/avatar",
         url_name="avatar",
     )
@@ -94,11 +111,16 @@ class UserViewSet(UserViewSet):
 
     @avatar.mapping.delete
     def delete_avatar(self, request: Request, *args, **kwargs):
-        """Delete the authenticated user's avatar."""
+        """
+        Delete the authenticated user's avatar.
+
+        The file may be shared with other uploads, so it is only
+        unreferenced here and removed later by ``collect_media``.
+        """
         user = self.request.user
         if user.avatar:
-            user.avatar.delete(save=False)
-            user.save()
+            user.avatar = None
+            user.save(update_fields=("avatar",))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -113,10 +135,12 @@ class UserViewSet(UserViewSet):
         """
         subscriptions = User.objects.filter(subscribers__user=request.user)
         page = self.paginate_queryset(subscriptions)
-        serializer = UserWithRecipesSerializer(
-            page,
-            many=True,
-            context={"request": request},
+        serializer = timed_serializer(
+            UserWithRecipesSerializer(
+                page,
+                many=True,
+                context=self.get_serializer_context(),
+            ),
         )
         return self.get_paginated_response(serializer.data)
 
@@ -129,13 +153,14 @@ class UserViewSet(UserViewSet):
     def subscribe(self, request, id=None):
         """Subscribe the authenticated user to another user."""
         author = get_object_or_404(User, id=id)
-        serializer = SubscriptionSerializer(
-            data={"user": request.user.id, "author": author.id},
-            context={"request": request},
+        serializer = timed_serializer(
+            SubscriptionSerializer(
+                data={"user": request.user.id, "author": author.id},
+                context={"request": request},
+            ),
         )
         serializer.is_valid(raise_exception=True)
         serializer.save(user=self.request.user)
-        serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @subscribe.mapping.delete
@@ -154,7 +179,11 @@ class UserViewSet(UserViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(
+    SerializerTimingMixin,
+    CachedCollectionMixin,
+    ReadOnlyModelViewSet,
+):
     """View set for retrieving tags."""
 
     queryset = Tag.objects.all()
@@ -162,12 +191,17 @@ class TagViewSet(ReadOnlyModelViewSet):
     permission_classes = (AllowAny,)
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(
+    SerializerTimingMixin,
+    SparseFieldsViewMixin,
+    ModelViewSet,
+):
     """View set for managing recipes."""
 
     queryset = Recipe.objects.all()
     pagination_class = FoodgramPagination
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
+    parser_classes = (ORJSONParser, MultiPartJSONParser)
     filter_backends = [DjangoFilterBackend, SearchFilter]
     filterset_class = RecipeFilter
     search_fields = [
@@ -176,6 +210,45 @@ class RecipeViewSet(ModelViewSet):
         "is_favorited",
         "is_in_shopping_cart",
     ]
+    # Serializer of ``.values()`` rows used for JSON list and retrieve
+    # responses instead of RecipeReadSerializer, None disables it.
+    fast_read_serializer_class = RecipeRowSerializer
+
+    def use_fast_read(self):
+        """Whether the request is served by fast_read_serializer_class."""
+        renderer = getattr(self.request, "accepted_renderer", None)
+        return (
+            self.fast_read_serializer_class is not None
+            and self.action in ("list", "retrieve")
+            and getattr(renderer, "format", None) == "json"
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fieldset = self.fieldset
+        if self.use_fast_read():
+            return queryset.values(
+                *self.fast_read_serializer_class.selected_columns(fieldset),
+            )
+        if self.action not in ("list", "retrieve"):
+            return queryset
+        if fieldset.includes("author"):
+            queryset = queryset.select_related("author")
+        if fieldset.includes("tags"):
+            queryset = queryset.prefetch_related("tags")
+        if fieldset.includes("ingredients"):
+            # Ingredients keep the order the author entered them in.
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "recipeingredient_set",
+                    queryset=RecipeIngredient.objects.select_related(
+                        "ingredient",
+                    ).order_by("id"),
+                ),
+            )
+        if not fieldset.includes("text"):
+            queryset = queryset.defer("text")
+        return queryset
 
     def get_serializer_class(self):
         """
@@ -183,6 +256,8 @@ class RecipeViewSet(ModelViewSet):
         """
         if self.request.method in ["POST", "PUT", "PATCH"]:
             return RecipeWriteSerializer
+        if self.use_fast_read():
+            return self.fast_read_serializer_class
         return RecipeReadSerializer
 
     @action(
@@ -193,13 +268,16 @@ class RecipeViewSet(ModelViewSet):
     def favorite(self, request, pk=None):
         """Add a recipe to the authenticated user's favorites."""
         recipe = get_object_or_404(Recipe, pk=pk)
-        serializer = FavoriteSerializer(
-            data={"recipe": recipe.id},
-            context={"request": request},
+        serializer = timed_serializer(
+            FavoriteSerializer(
+                data={"recipe": recipe.id},
+                context={"request": request},
+            ),
         )
-        serializer.is_valid(raise_exception=True)
-        serializer.save(user=self.request.user)
-        serializer.save()
+        with transaction.atomic():
+            self._lock_lists(request.user)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(user=self.request.user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @favorite.mapping.delete
@@ -223,13 +301,16 @@ class RecipeViewSet(ModelViewSet):
     def add_to_shopping_cart(self, request, pk=None):
         """Add a recipe to the authenticated user's shopping cart."""
         recipe = get_object_or_404(Recipe, pk=pk)
-        serializer = ShoppingCartSerializer(
-            data={"recipe": recipe.id},
-            context={"request": request},
+        serializer = timed_serializer(
+            ShoppingCartSerializer(
+                data={"recipe": recipe.id},
+                context={"request": request},
+            ),
         )
-        serializer.is_valid(raise_exception=True)
-        serializer.save(user=self.request.user)
-        serializer.save()
+        with transaction.atomic():
+            self._lock_lists(request.user)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(user=self.request.user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @add_to_shopping_cart.mapping.delete
@@ -247,6 +328,163 @@ class RecipeViewSet(ModelViewSet):
             )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def _lock_lists(self, user):
+        """
+        Lock the favorites and shopping cart of ``user`` until commit.
+
+        Additions take the lock before checking which recipes are already
+        added, so concurrent ones never insert or count a recipe twice.
+        SQLite has no row locks: there the IMMEDIATE transactions of the
+        tuned SQLITE_PROFILE serialize additions, and with deferred ones
+        bulk additions rely on ignoring conflicts.
+        """
+        list(
+            User.objects.select_for_update()
+            .filter(pk=user.pk)
+            .values_list("pk", flat=True),
+        )
+
+    def _bulk_recipes(self, request, model):
+        """
+        Return the payload recipe ids with whether ``model`` has each.
+
+        Ids of missing recipes map to None.
+        """
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data["recipes"]
+        added = dict(
+            Recipe.objects.filter(pk__in=recipe_ids)
+            .annotate(
+                added=Exists(
+                    model.objects.filter(
+                        user=request.user,
+                        recipe=OuterRef("pk"),
+                    ),
+                ),
+            )
+            .values_list("pk", "added"),
+        )
+        return {pk: added.get(pk) for pk in recipe_ids}
+
+    def _add_many(self, request, model):
+        """
+        Add the payload recipes to ``model`` of the authenticated user.
+
+        Missing and already added recipes are reported per id, the rest
+        is inserted with a single query.
+        """
+        recipes = self._bulk_recipes(request, model)
+        if False in recipes.values():
+            added = model.objects.filter(
+                user=request.user,
+                recipe_id__in=recipes,
+            ).values_list("recipe_id", flat=True)
+            with transaction.atomic():
+                self._lock_lists(request.user)
+                # Recipes added since _bulk_recipes checked are skipped.
+                existing = set(added)
+                recipes.update(dict.fromkeys(existing, True))
+                model.objects.bulk_create(
+                    [
+                        model(user=request.user, recipe_id=pk)
+                        for pk, was_added in recipes.items()
+                        if was_added is False
+                    ],
+                    # The lock does nothing on SQLite, where a concurrent
+                    # addition may still insert the same rows first.
+                    ignore_conflicts=True,
+                )
+                # Count only the rows this request inserted.
+                inserted = set(added.all()) - existing
+                for pk, was_added in recipes.items():
+                    if was_added is False and pk not in inserted:
+                        recipes[pk] = True
+                # bulk_create sends no post_save to count the additions.
+                rankings.record(request.user.pk, inserted)
+        return Response(
+            {
+                "results": [
+                    {
+                        "id": pk,
+                        "status": {
+                            None: "not_found",
+                            False: "added",
+                            True: "already_added",
+                        }[added],
+                    }
+                    for pk, added in recipes.items()
+                ],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    def _remove_many(self, request, model):
+        """
+        Remove the payload recipes from ``model`` of the authenticated user.
+
+        Missing and not added recipes are reported per id, the rest is
+        deleted with a single query.
+        """
+        recipes = self._bulk_recipes(request, model)
+        removed = [pk for pk, added in recipes.items() if added]
+        if removed:
+            with transaction.atomic(), rankings.batched():
+                model.objects.filter(
+                    user=request.user,
+                    recipe_id__in=removed,
+                ).delete()
+        return Response(
+            {
+                "results": [
+                    {
+                        "id": pk,
+                        "status": {
+                            None: "not_found",
+                            False: "not_added",
+                            True: "removed",
+                        }[added],
+                    }
+                    for pk, added in recipes.items()
+                ],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAuthenticated],
+        url_path="favorite",
+        url_name="favorite-bulk",
+    )
+    def favorite_many(self, request):
+        """Add several recipes to the authenticated user's favorites."""
+        return self._add_many(request, Favorite)
+
+    @favorite_many.mapping.delete
+    def unfavorite_many(self, request):
+        """Remove several recipes from the authenticated user's favorites."""
+        return self._remove_many(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAuthenticated],
+        url_path="shopping_cart",
+        url_name="shopping-cart-bulk",
+    )
+    def add_many_to_shopping_cart(self, request):
+        """Add several recipes to the authenticated user's shopping cart."""
+        return self._add_many(request, ShoppingCart)
+
+    @add_many_to_shopping_cart.mapping.delete
+    def remove_many_from_shopping_cart(self, request):
+        """
+        Remove several recipes from the authenticated user's shopping cart.
+        """
+        return self._remove_many(request, ShoppingCart)
+
     @action(
         detail=False,
         methods=["get"],
@@ -302,14 +540,15 @@ class RecipeViewSet(ModelViewSet):
     def get_recipe_link(self, request, pk=None):
         """Generate a short link for the recipe."""
         recipe = self.get_object()
-        if not recipe.short_link:
-            recipe.short_link = recipe.generate_short_link()
-            recipe.save()
-        short_link = f"https://kittygram.biz/s/{recipe.short_link}"
+        short_link = f"https://kittygram.biz/s/{recipe.short_code}"
         return Response({"short-link": short_link}, status=status.HTTP_200_OK)
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(
+    SerializerTimingMixin,
+    CachedCollectionMixin,
+    ReadOnlyModelViewSet,
+):
     """View set for retrieving ingredients."""
 
     queryset = Ingredient.objects.all()
@@ -0,0 +1,52 @@
+"""
+Benchmarks of the Foodgram backend.
+
+Run a benchmark from the ``backend`` directory, e.g.
+``python -m benchmarks.shortlinks``. Benchmarks work on a throwaway test
+database filled with generated data, so the development database is left
+untouched.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+
+def setup():
+    """Configure Django for a standalone benchmark script."""
+    os.environ.setdefault(
+        "DJANGO_SETTINGS_MODULE",
+        "foodgram_backend.settings",
+    )
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def test_database(verbosity=0):
+    """Create a test database for the duration of the block."""
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+def measure(func, iterations):
+    """Call ``func`` repeatedly and return calls per second."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return iterations / (time.perf_counter() - started)
+
+
+def report(title, rows):
+    """Print ``(name, value)`` rows under a title."""
+    print(title)
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f"  {name:<{width}}  {value}")
@@ -0,0 +1,229 @@
+"""
+Throughput, latency and memory of the read endpoints served by gunicorn
+with sync workers (WSGI, DRF view sets) and with uvicorn workers (ASGI,
+ASYNC_VIEWS enabled).
+
+Both servers run the same number of worker processes on a copy of one
+generated SQLite database and receive the same request mix from a pool
+of client threads at several concurrency levels.
+"""
+
+import argparse
+import http.client
+import os
+import random
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks import report, setup
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    "wsgi": ("foodgram_backend.wsgi:application", "sync", "False"),
+    "asgi": (
+        "foodgram_backend.asgi:application",
+        "uvicorn.workers.UvicornWorker",
+        "True",
+    ),
+}
+
+
+def urls(recipe_ids, rng, count):
+    """Return ``count`` request paths of the measured endpoints."""
+    from recipes.shortlinks import encode
+
+    paths = []
+    for _ in range(count):
+        recipe_id = rng.choice(recipe_ids)
+        paths.append(
+            rng.choice(
+                (
+                    f"/api/recipes/?limit=6&page={rng.randint(1, 50)}",
+                    f"/api/recipes/{recipe_id}/",
+                    "/api/ingredients/?name=ingredient%20"
+                    f"0{rng.randint(0, 9)}",
+                    f"/s/{encode(recipe_id)}",
+                ),
+            ),
+        )
+    return paths
+
+
+def rss(pid):
+    """Return the resident memory of a process and its children in MB."""
+    total = 0
+    pending = [pid]
+    while pending:
+        pid = pending.pop()
+        try:
+            status = Path(f"/proc/{pid}/status").read_text()
+            for task in Path(f"/proc/{pid}/task").iterdir():
+                children = (task / "children").read_text().split()
+                pending.extend(int(child) for child in children)
+        except FileNotFoundError:
+            continue
+        for line in status.splitlines():
+            if line.startswith("VmRSS:"):
+                total += int(line.split()[1])
+    return total / 1024
+
+
+def start(server, path, port, workers):
+    """Start a gunicorn server and wait until it answers."""
+    application, worker_class, async_views = SERVERS[server]
+    environment = dict(
+        os.environ,
+        SQLITE_PATH=path,
+        ASYNC_VIEWS=async_views,
+        DEBUG="False",
+        ALLOWED_HOSTS="127.0.0.1",
+    )
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            application,
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--workers",
+            str(workers),
+            "--worker-class",
+            worker_class,
+            "--log-level",
+            "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=environment,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port)
+            connection.request("GET", "/api/tags/")
+            connection.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{server} server did not start.")
+
+
+def load(port, paths, concurrency):
+    """Send ``paths`` from ``concurrency`` threads, return rate and latency."""
+    latencies = []
+    errors = []
+    position = iter(range(len(paths)))
+    lock = threading.Lock()
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        while True:
+            with lock:
+                index = next(position, None)
+            if index is None:
+                break
+            started = time.perf_counter()
+            try:
+                connection.request("GET", paths[index])
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors.append(index)
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port)
+                continue
+            latencies.append(time.perf_counter() - started)
+            if response.status >= 500:
+                errors.append(index)
+        connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return (
+        len(latencies) / elapsed,
+        statistics.median(latencies) * 1000,
+        latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        len(errors),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--recipes", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 8, 32, 64],
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    options = parser.parse_args()
+    directory = tempfile.mkdtemp(prefix="foodgram-asgi-")
+    base = os.path.join(directory, "base.sqlite3")
+    os.environ["SQLITE_PATH"] = base
+    setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    from benchmarks.data import create_dataset
+
+    try:
+        call_command("migrate", verbosity=0)
+        recipe_ids = create_dataset(users=200, recipes=options.recipes)
+        connection.close()
+        rng = random.Random(0)
+        paths = urls(recipe_ids, rng, options.requests)
+        rows = []
+        for server in SERVERS:
+            path = os.path.join(directory, f"{server}.sqlite3")
+            shutil.copyfile(base, path)
+            process = start(server, path, options.port, options.workers)
+            try:
+                # Warm up workers, caches and connections.
+                load(options.port, paths[:200], options.workers * 4)
+                for concurrency in options.concurrency:
+                    rate, median, p99, errors = load(
+                        options.port,
+                        paths,
+                        concurrency,
+                    )
+                    rows.append(
+                        (
+                            f"{server} x{concurrency}",
+                            f"{rate:8,.0f} req/s  p50 {median:7.1f} ms  "
+                            f"p99 {p99:7.1f} ms  {errors} errors  "
+                            f"RSS {rss(process.pid):6.1f} MB",
+                        ),
+                    )
+            finally:
+                process.send_signal(signal.SIGTERM)
+                process.wait(timeout=30)
+    finally:
+        shutil.rmtree(directory)
+    report(
+        f"Read endpoints, {options.workers} workers, "
+        f"{options.requests} requests per level",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Adding recipes to and removing them from the shopping cart one request
+per recipe and with a single bulk request: time and queries per batch.
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks import report, setup, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    options = parser.parse_args()
+    setup()
+
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+
+    from benchmarks.data import create_dataset
+    from benchmarks.serializers import QueryCounter
+    from foodgram_backend.db import execute_wrapper
+    from users.models import User
+
+    rows = []
+    with test_database():
+        recipe_ids = create_dataset(
+            recipes=options.batch,
+            favorites_per_user=0,
+            carts_per_user=0,
+        )
+        token = Token.objects.create(user=User.objects.first())
+        client = Client(headers={"Authorization": f"Token {token.key}"})
+        payload = json.dumps({"recipes": recipe_ids})
+
+        def single(method):
+            for pk in recipe_ids:
+                getattr(client, method)(f"/api/recipes/{pk}/shopping_cart/")
+
+        def bulk(method):
+            getattr(client, method)(
+                "/api/recipes/shopping_cart/",
+                payload,
+                content_type="application/json",
+            )
+
+        for name, change in (("per recipe", single), ("bulk", bulk)):
+            queries = QueryCounter()
+            elapsed = 0
+            for _ in range(options.rounds):
+                for method in ("post", "delete"):
+                    started = time.perf_counter()
+                    with execute_wrapper(queries):
+                        change(method)
+                    elapsed += time.perf_counter() - started
+            batches = options.rounds * 2
+            rows.append(
+                (
+                    f"{options.batch} recipes {name}",
+                    f"{elapsed / batches * 1000:8,.1f} ms  "
+                    f"{queries.count // batches:5} queries",
+                ),
+            )
+    report("Shopping cart add and remove", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Sizes and requests per second of JSON responses without compression,
+compressed per request by CompressionMiddleware and served from the
+collection cache with precompressed copies.
+"""
+
+import argparse
+
+from benchmarks import measure, report, setup, test_database
+
+ENCODINGS = ("identity", "gzip", "br")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=500)
+    parser.add_argument("--ingredients", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=200)
+    options = parser.parse_args()
+    setup()
+
+    from django.core.cache import cache
+    from django.test import Client, override_settings
+
+    from benchmarks.data import create_dataset
+    from foodgram_backend.compression import available_encodings
+
+    client = Client()
+    rows = []
+    with test_database():
+        create_dataset(
+            recipes=options.recipes,
+            ingredients=options.ingredients,
+        )
+        for url, cached in (
+            ("/api/recipes/?limit=100", False),
+            ("/api/ingredients/", False),
+            ("/api/ingredients/", True),
+        ):
+            for encoding in ENCODINGS:
+                if encoding != "identity" and (
+                    encoding not in available_encodings()
+                ):
+                    continue
+                with override_settings(
+                    COLLECTION_CACHE_TIMEOUT=3600 if cached else 0,
+                    COMPRESSION_MIN_SIZE=0 if encoding == "identity" else 1024,
+                ):
+                    cache.clear()
+
+                    def request():
+                        return client.get(
+                            url,
+                            headers={"Accept-Encoding": encoding},
+                        )
+
+                    size = len(request().content)
+                    rate = measure(request, options.requests)
+                rows.append(
+                    (
+                        f"{url} {'cached ' if cached else ''}{encoding}",
+                        f"{size:9,} bytes  {rate:8,.0f} req/s",
+                    ),
+                )
+    report("JSON response compression", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Generated data sets for the benchmarks."""
+
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from favorites.models import Favorite
+from recipes import rankings
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from shopping_lists.models import ShoppingCart
+from subscriptions.models import Subscription
+
+User = get_user_model()
+
+
+def create_dataset(
+    users=20,
+    recipes=1000,
+    ingredients=500,
+    tags=10,
+    ingredients_per_recipe=8,
+    favorites_per_user=0,
+    carts_per_user=0,
+    subscriptions_per_user=0,
+    seed=0,
+):
+    """
+    Fill the database with users, tags, ingredients and recipes.
+
+    Each user also gets the given number of favorites, shopping cart
+    entries and subscriptions to other users.
+    """
+    rng = random.Random(seed)
+    password = make_password(None)
+    User.objects.bulk_create(
+        User(
+            email=f"user{index}@example.com",
+            username=f"user{index}",
+            first_name="Bench",
+            last_name=f"User{index}",
+            password=password,
+        )
+        for index in range(users)
+    )
+    Tag.objects.bulk_create(
+        Tag(name=f"Tag {index}", slug=f"tag-{index}") for index in range(tags)
+    )
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f"ingredient {index:05d}", measurement_unit="g")
+        for index in range(ingredients)
+    )
+    user_ids = list(User.objects.values_list("id", flat=True))
+    tag_ids = list(Tag.objects.values_list("id", flat=True))
+    ingredient_ids = list(Ingredient.objects.values_list("id", flat=True))
+    Recipe.objects.bulk_create(
+        Recipe(
+            name=f"Recipe {index:06d}",
+            author_id=rng.choice(user_ids),
+            image=f"recipes/images/bench-{index}.png",
+            text="Mix everything and cook. " * 20,
+            cooking_time=rng.randint(5, 120),
+        )
+        for index in range(recipes)
+    )
+    recipe_ids = list(Recipe.objects.values_list("id", flat=True))
+    Tags = Recipe.tags.through
+    Tags.objects.bulk_create(
+        Tags(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in rng.sample(tag_ids, min(2, len(tag_ids)))
+    )
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe_id=recipe_id,
+            ingredient_id=ingredient_id,
+            amount=rng.randint(1, 500),
+        )
+        for recipe_id in recipe_ids
+        for ingredient_id in rng.sample(
+            ingredient_ids,
+            min(ingredients_per_recipe, len(ingredient_ids)),
+        )
+    )
+    for model, per_user in (
+        (Favorite, favorites_per_user),
+        (ShoppingCart, carts_per_user),
+    ):
+        model.objects.bulk_create(
+            model(user_id=user_id, recipe_id=recipe_id)
+            for user_id in user_ids
+            for recipe_id in rng.sample(
+                recipe_ids,
+                min(per_user, len(recipe_ids)),
+            )
+        )
+    Subscription.objects.bulk_create(
+        Subscription(user_id=user_id, author_id=author_id)
+        for user_id in user_ids
+        for author_id in rng.sample(
+            [author_id for author_id in user_ids if author_id != user_id],
+            min(subscriptions_per_user, len(user_ids) - 1),
+        )
+    )
+    rankings.rebuild()
+    return recipe_ids
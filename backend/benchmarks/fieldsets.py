@@ -0,0 +1,66 @@
+"""
+Size, requests per second and queries of full recipe and user listings
+and of the same listings pruned with ``fields`` and ``omit``, for an
+authenticated user.
+"""
+
+import argparse
+
+from benchmarks import measure, report, setup, test_database
+
+LEAN_RECIPE_FIELDS = (
+    "id,name,image,cooking_time,author.first_name,author.last_name"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=100)
+    options = parser.parse_args()
+    setup()
+
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+
+    from benchmarks.data import create_dataset
+    from benchmarks.serializers import QueryCounter
+    from foodgram_backend.db import execute_wrapper
+    from users.models import User
+
+    rows = []
+    with test_database():
+        create_dataset(
+            users=50,
+            recipes=options.recipes,
+            favorites_per_user=20,
+            carts_per_user=5,
+            subscriptions_per_user=10,
+        )
+        token = Token.objects.create(user=User.objects.first())
+        client = Client(headers={"Authorization": f"Token {token.key}"})
+        for url in (
+            "/api/recipes/?limit=100",
+            f"/api/recipes/?limit=100&fields={LEAN_RECIPE_FIELDS}",
+            "/api/recipes/?limit=100&omit=text,ingredients",
+            "/api/recipes/?limit=100&format=api",
+            f"/api/recipes/?limit=100&format=api&fields={LEAN_RECIPE_FIELDS}",
+            "/api/users/subscriptions/?recipes_limit=3",
+            "/api/users/subscriptions/?fields=id,username,recipes_count",
+        ):
+            queries = QueryCounter()
+            with execute_wrapper(queries):
+                size = len(client.get(url).content)
+            rate = measure(lambda: client.get(url), options.requests)
+            rows.append(
+                (
+                    url,
+                    f"{size:9,} bytes  {rate:8,.1f} req/s  "
+                    f"{queries.count:4} queries",
+                ),
+            )
+    report(f"Sparse fieldsets, {options.recipes} recipes", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Time to ready and per-worker memory of gunicorn started with
+``gunicorn.conf.py`` without preloading, with preloading and with
+preloading followed by ``gc.freeze()``.
+
+Each variant serves the same request mix, so workers run garbage
+collections, before the memory of every worker is read from
+``/proc/<pid>/smaps_rollup``. PSS splits shared pages between the
+processes sharing them, so lower PSS means more memory shared with the
+master.
+"""
+
+import argparse
+import http.client
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import report, setup
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+VARIANTS = {
+    "no preload": {"GUNICORN_PRELOAD": "False"},
+    "preload": {"GUNICORN_PRELOAD": "True", "GUNICORN_GC_FREEZE": "False"},
+    "preload + gc.freeze": {
+        "GUNICORN_PRELOAD": "True",
+        "GUNICORN_GC_FREEZE": "True",
+    },
+}
+
+
+def children(pid):
+    """Return the ids of the child processes of a process."""
+    return [
+        int(child)
+        for task in Path(f"/proc/{pid}/task").iterdir()
+        for child in (task / "children").read_text().split()
+    ]
+
+
+def memory(pid):
+    """Return RSS, PSS and private memory of a process in MB."""
+    values = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+        name, _, value = line.partition(":")
+        if value.strip().endswith("kB"):
+            values[name] = int(value.split()[0]) / 1024
+    return (
+        values["Rss"],
+        values["Pss"],
+        values["Private_Clean"] + values["Private_Dirty"],
+    )
+
+
+def get(port, path):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        connection.request("GET", path)
+        return connection.getresponse().read()
+    finally:
+        connection.close()
+
+
+def run(variant, path, port, workers, paths):
+    """Return seconds to the first response and memory of every worker."""
+    environment = dict(
+        os.environ,
+        **VARIANTS[variant],
+        SQLITE_PATH=path,
+        DEBUG="False",
+        ALLOWED_HOSTS="127.0.0.1",
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_LOG_LEVEL="warning",
+    )
+    environment.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    started = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "foodgram_backend.wsgi"],
+        cwd=BACKEND_DIR,
+        env=environment,
+    )
+    try:
+        while True:
+            if time.monotonic() - started > 60:
+                raise RuntimeError(f"{variant} server did not start.")
+            try:
+                get(port, "/api/tags/")
+                break
+            except OSError:
+                time.sleep(0.05)
+        ready = time.monotonic() - started
+        for request_path in paths:
+            get(port, request_path)
+        return ready, [memory(pid) for pid in children(process.pid)]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--recipes", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8765)
+    options = parser.parse_args()
+    directory = tempfile.mkdtemp(prefix="foodgram-gunicorn-")
+    base = os.path.join(directory, "base.sqlite3")
+    os.environ["SQLITE_PATH"] = base
+    setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    from benchmarks.data import create_dataset
+
+    try:
+        call_command("migrate", verbosity=0)
+        recipe_ids = create_dataset(users=200, recipes=options.recipes)
+        connection.close()
+        rng = random.Random(0)
+        paths = [
+            rng.choice(
+                (
+                    f"/api/recipes/?limit=6&page={rng.randint(1, 50)}",
+                    f"/api/recipes/{rng.choice(recipe_ids)}/",
+                    "/api/ingredients/?name=ingredient",
+                    "/api/tags/",
+                ),
+            )
+            for _ in range(options.requests)
+        ]
+        rows = []
+        for variant in VARIANTS:
+            ready, workers = run(
+                variant,
+                base,
+                options.port,
+                options.workers,
+                paths,
+            )
+            rss, pss, private = (
+                sum(values) / len(workers) for values in zip(*workers)
+            )
+            rows.append(
+                (
+                    variant,
+                    f"ready {ready:6.2f} s  per worker: RSS {rss:6.1f} MB  "
+                    f"PSS {pss:6.1f} MB  private {private:6.1f} MB",
+                ),
+            )
+    finally:
+        shutil.rmtree(directory)
+    report(
+        f"gunicorn, {options.workers} workers, "
+        f"{options.requests} requests",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
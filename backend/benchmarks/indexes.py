@@ -0,0 +1,164 @@
+"""
+Query plans and timings of hot query shapes with and without the indexes
+added in migration ``recipes.0004_recipe_indexes``.
+
+The data set is generated once with the current schema, then the schema
+is migrated back to the previous indexes and the queries are run again.
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks import report, setup, test_database
+
+# Migrations before the index changes, applied to measure the old schema.
+PREVIOUS_MIGRATIONS = (
+    ("favorites", "0003_initial"),
+    ("recipes", "0003_mediafile_alter_recipe_image"),
+    ("shopping_lists", "0002_initial"),
+    ("subscriptions", "0002_initial"),
+)
+
+
+def query_shapes(user_ids, recipe_ids, rng):
+    """Return ``(name, queryset factory)`` pairs of measured queries."""
+    from django.db.models import Sum
+
+    from favorites.models import Favorite
+    from recipes.models import Recipe, RecipeIngredient
+    from shopping_lists.models import ShoppingCart
+    from subscriptions.models import Subscription
+    from users.models import User
+
+    def recipe_page():
+        offset = rng.randrange(0, len(recipe_ids), 6)
+        return Recipe.objects.order_by("name")[offset:offset + 6]
+
+    return (
+        ("recipe list page", recipe_page),
+        (
+            "recipes of an author",
+            lambda: Recipe.objects.filter(
+                author_id=rng.choice(user_ids),
+            ).order_by("name")[:3],
+        ),
+        (
+            "favorited recipes of a user",
+            lambda: Recipe.objects.filter(
+                favorites__user_id=rng.choice(user_ids),
+            )[:6],
+        ),
+        (
+            "favorites of a recipe",
+            lambda: Favorite.objects.filter(
+                recipe_id=rng.choice(recipe_ids),
+            ).values("id"),
+        ),
+        (
+            "subscriptions of a user",
+            lambda: User.objects.filter(
+                subscribers__user_id=rng.choice(user_ids),
+            )[:6],
+        ),
+        (
+            "subscribers of an author",
+            lambda: Subscription.objects.filter(
+                author_id=rng.choice(user_ids),
+            ).values("id"),
+        ),
+        (
+            "ingredients of a recipe",
+            lambda: RecipeIngredient.objects.filter(
+                recipe_id=rng.choice(recipe_ids),
+            ).values("ingredient_id", "amount"),
+        ),
+        (
+            "shopping list of a user",
+            lambda: ShoppingCart.objects.filter(
+                user_id=rng.choice(user_ids),
+            )
+            .values("recipe__recipeingredient__ingredient_id")
+            .annotate(total=Sum("recipe__recipeingredient__amount")),
+        ),
+    )
+
+
+def run(shapes, iterations, seed):
+    """Return plans and milliseconds per query of each shape."""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    results = {}
+    for name, factory in shapes:
+        plan = factory().explain()
+        random.seed(seed)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            list(factory())
+        elapsed = time.perf_counter() - started
+        results[name] = (plan, elapsed / iterations * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--recipes", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--plans",
+        action="store_true",
+        help="Print query plans",
+    )
+    options = parser.parse_args()
+    setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    from benchmarks.data import create_dataset
+    from users.models import User
+
+    with test_database():
+        recipe_ids = create_dataset(
+            users=options.users,
+            recipes=options.recipes,
+            ingredients_per_recipe=8,
+            favorites_per_user=20,
+            carts_per_user=5,
+            subscriptions_per_user=10,
+        )
+        user_ids = list(User.objects.values_list("id", flat=True))
+        shapes = query_shapes(user_ids, recipe_ids, random)
+        after = run(shapes, options.iterations, seed=0)
+        for app_label, migration in PREVIOUS_MIGRATIONS:
+            call_command("migrate", app_label, migration, verbosity=0)
+        before = run(shapes, options.iterations, seed=0)
+        vendor = connection.vendor
+    rows = [
+        (
+            name,
+            f"{before[name][1]:8.3f} ms -> {after[name][1]:8.3f} ms "
+            f"({before[name][1] / after[name][1]:5.1f}x)",
+        )
+        for name, _ in shapes
+    ]
+    report(
+        f"Query time per call on {vendor}, {options.users} users, "
+        f"{options.recipes} recipes, old -> new indexes",
+        rows,
+    )
+    if options.plans:
+        for name, _ in shapes:
+            print(f"\n{name}\n  old:")
+            for line in before[name][0].splitlines():
+                print(f"    {line}")
+            print("  new:")
+            for line in after[name][0].splitlines():
+                print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
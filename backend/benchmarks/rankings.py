@@ -0,0 +1,76 @@
+"""
+Most popular recipes read from the ranking table and computed with an
+aggregate over favorites and shopping carts, plus the ranked API page.
+Both queries must return the same popularity order.
+"""
+
+import argparse
+import sys
+
+from benchmarks import measure, report, setup, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--recipes", type=int, default=5000)
+    parser.add_argument("--favorites", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=100)
+    options = parser.parse_args()
+    setup()
+
+    from django.db.models import Count, F
+    from django.test import Client
+
+    from benchmarks.data import create_dataset
+    from recipes.constants import RANKING_ORDERINGS
+    from recipes.models import Recipe
+
+    with test_database():
+        create_dataset(
+            users=options.users,
+            recipes=options.recipes,
+            favorites_per_user=options.favorites,
+            carts_per_user=options.favorites // 5,
+        )
+        ranked = (
+            Recipe.objects.filter(ranking__isnull=False)
+            .order_by(*RANKING_ORDERINGS["popular"])
+            .values_list("id", "ranking__popularity")[:10]
+        )
+        aggregated = (
+            Recipe.objects.alias(
+                favorite_count=Count("favorites", distinct=True),
+                cart_count=Count("in_carts", distinct=True),
+            )
+            .annotate(popularity=F("favorite_count") + F("cart_count"))
+            .order_by("-popularity", "id")
+            .values_list("id", "popularity")[:10]
+        )
+        identical = list(ranked) == list(aggregated)
+        rows = [("identical top 10", str(identical))]
+        for name, queryset in (
+            ("ranking table", ranked),
+            ("aggregate", aggregated),
+        ):
+            rate = measure(lambda: list(queryset.all()), options.requests)
+            rows.append((f"top 10 query, {name}", f"{rate:8,.1f} /s"))
+        client = Client()
+        for url in (
+            "/api/recipes/?limit=10",
+            "/api/recipes/?limit=10&ordering=popular",
+            "/api/recipes/?limit=10&ordering=trending",
+        ):
+            rate = measure(lambda: client.get(url), options.requests)
+            rows.append((url, f"{rate:8,.1f} req/s"))
+    report(
+        f"Recipe rankings, {options.recipes} recipes, "
+        f"{options.users * options.favorites} favorites",
+        rows,
+    )
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Rendering and parsing of typical payloads with DRF's JSONRenderer and
+JSONParser and with the orjson based ORJSONRenderer and ORJSONParser.
+
+The rendered payload is the data of ``/api/recipes/?limit=100``; some
+recipe texts contain Cyrillic and U+2028 characters. Both renderers must
+produce the same bytes, the script exits with an error otherwise.
+"""
+
+import argparse
+import io
+import sys
+
+from benchmarks import measure, report, setup, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=500)
+    options = parser.parse_args()
+    setup()
+
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import APIClient
+
+    from api.v1 import parsers, renderers
+    from benchmarks.data import create_dataset
+    from recipes.models import Recipe
+
+    if renderers.orjson is None:
+        sys.exit("orjson is not installed.")
+    with test_database():
+        recipe_ids = create_dataset(recipes=200)
+        Recipe.objects.filter(pk__in=recipe_ids[::3]).update(
+            text="Смешать всё и готовить 20 минут.\u2028"
+            "Подавать горячим. " * 10,
+        )
+        data = APIClient().get("/api/recipes/?limit=100").data
+    rows = []
+    content = JSONRenderer().render(data)
+    identical = renderers.ORJSONRenderer().render(data) == content
+    rows.append(("identical output", f"{identical}, {len(content):,} bytes"))
+    for name, renderer in (
+        ("JSONRenderer", JSONRenderer()),
+        ("ORJSONRenderer", renderers.ORJSONRenderer()),
+    ):
+        rate = measure(lambda: renderer.render(data), options.iterations)
+        rows.append((f"render, {name}", f"{rate:10,.0f} pages/s"))
+    for name, json_parser in (
+        ("JSONParser", JSONParser()),
+        ("ORJSONParser", parsers.ORJSONParser()),
+    ):
+        rate = measure(
+            lambda: json_parser.parse(io.BytesIO(content)),
+            options.iterations,
+        )
+        rows.append((f"parse, {name}", f"{rate:10,.0f} pages/s"))
+    report("JSON of /api/recipes/?limit=100", rows)
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Recipe list and detail responses with RecipeReadSerializer and with the
+``.values()`` based RecipeRowSerializer.
+
+Requests per second and queries per request of both serializers are
+measured for an anonymous and an authenticated user, and the serializers
+alone on a page of already loaded anonymous data, where
+RecipeReadSerializer runs no queries. That both return the same bodies
+is checked by the tests of the ``api`` app.
+"""
+
+import argparse
+
+from benchmarks import measure, report, setup, test_database
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    options = parser.parse_args()
+    setup()
+
+    from django.db.models import Prefetch
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from api.v1.serializers import RecipeReadSerializer, RecipeRowSerializer
+    from api.v1.views import RecipeViewSet
+    from benchmarks.data import create_dataset
+    from foodgram_backend.db import execute_wrapper
+    from recipes.models import Recipe, RecipeIngredient
+    from users.models import User
+
+    fast_serializer = RecipeViewSet.fast_read_serializer_class
+
+    def get(client, url, fast):
+        RecipeViewSet.fast_read_serializer_class = (
+            fast_serializer if fast else None
+        )
+        try:
+            return client.get(url)
+        finally:
+            RecipeViewSet.fast_read_serializer_class = fast_serializer
+
+    with test_database():
+        recipe_ids = create_dataset(
+            users=50,
+            recipes=options.recipes,
+            favorites_per_user=20,
+            carts_per_user=5,
+            subscriptions_per_user=10,
+        )
+        user = User.objects.first()
+        User.objects.filter(pk=user.pk).update(
+            avatar="users/avatars/bench.png",
+        )
+        token = Token.objects.create(user=user)
+        clients = {
+            "anonymous": Client(),
+            "authenticated": Client(
+                headers={"Authorization": f"Token {token.key}"},
+            ),
+        }
+        rows = []
+        for url in (
+            "/api/recipes/?limit=100",
+            f"/api/recipes/{recipe_ids[0]}/",
+        ):
+            for who, client in clients.items():
+                for fast, name in ((False, "DRF"), (True, "rows")):
+                    queries = QueryCounter()
+                    with execute_wrapper(queries):
+                        get(client, url, fast)
+                    rate = measure(
+                        lambda: get(client, url, fast),
+                        options.requests,
+                    )
+                    rows.append(
+                        (
+                            f"{url} {who} {name}",
+                            f"{rate:8,.1f} req/s  {queries.count:4} queries",
+                        ),
+                    )
+        request = Request(APIRequestFactory().get("/api/recipes/"))
+        objects = list(
+            Recipe.objects.select_related("author").prefetch_related(
+                "tags",
+                Prefetch(
+                    "recipeingredient_set",
+                    queryset=RecipeIngredient.objects.select_related(
+                        "ingredient",
+                    ),
+                ),
+            )[:100],
+        )
+        values = list(
+            Recipe.objects.values(*RecipeRowSerializer.columns)[:100],
+        )
+        for name, serializer_class, page in (
+            ("DRF", RecipeReadSerializer, objects),
+            ("rows", RecipeRowSerializer, values),
+        ):
+            rate = measure(
+                lambda: serializer_class(
+                    page,
+                    many=True,
+                    context={"request": request},
+                ).data,
+                options.requests,
+            )
+            rows.append(
+                (
+                    f"serializer only, 100 recipes {name}",
+                    f"{rate:8,.1f} pages/s",
+                ),
+            )
+    report(f"Recipe serializers, {options.recipes} recipes", rows)
+
+
+if __name__ == "__main__":
+    main()
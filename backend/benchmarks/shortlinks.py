@@ -0,0 +1,100 @@
+"""Redirects per second of /s/<code> with and without the resolver cache."""
+
+import argparse
+import random
+
+from benchmarks import measure, report, setup, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument(
+        "--unknown",
+        type=float,
+        default=0.1,
+        help="Share of requests with unknown codes",
+    )
+    options = parser.parse_args()
+    setup()
+
+    from django.core.cache import cache
+    from django.test import Client, override_settings
+
+    from benchmarks.data import create_dataset
+    from recipes import shortlinks
+
+    with test_database():
+        recipe_ids = create_dataset(
+            recipes=options.recipes,
+            ingredients_per_recipe=1,
+        )
+        rng = random.Random(0)
+        codes = [shortlinks.encode(recipe_id) for recipe_id in recipe_ids]
+        unknown = [
+            shortlinks.encode(max(recipe_ids) + index + 1)
+            for index in range(100)
+        ]
+
+        def next_code():
+            if rng.random() < options.unknown:
+                return rng.choice(unknown)
+            return rng.choice(codes)
+
+        client = Client()
+
+        def request():
+            client.get(f"/s/{next_code()}")
+
+        def resolve():
+            shortlinks.resolve(next_code())
+
+        rows = []
+        with override_settings(SHORT_LINK_CACHE_TIMEOUT=0):
+            rows.append(
+                (
+                    "redirects/s, no cache",
+                    f"{measure(request, options.requests):,.0f}",
+                ),
+            )
+            rows.append(
+                (
+                    "resolve()/s, no cache",
+                    f"{measure(resolve, options.requests):,.0f}",
+                ),
+            )
+        cache.clear()
+        shortlinks.local_cache.clear()
+        rows.append(
+            (
+                "redirects/s, cached",
+                f"{measure(request, options.requests):,.0f}",
+            ),
+        )
+        rows.append(
+            (
+                "resolve()/s, cached",
+                f"{measure(resolve, options.requests):,.0f}",
+            ),
+        )
+
+        def resolve_shared():
+            shortlinks.local_cache.clear()
+            resolve()
+
+        rows.append(
+            (
+                "resolve()/s, shared cache only",
+                f"{measure(resolve_shared, options.requests):,.0f}",
+            ),
+        )
+    report(
+        f"Short link resolution, {options.recipes} recipes, "
+        f"{options.unknown:.0%} unknown codes",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Throughput of concurrent reads and favorite writes on a SQLite file with
+the default and the tuned SQLITE_PROFILE.
+
+Every worker process plays a gunicorn worker: it reads recipe pages and
+adds or removes favorites in transactions, like the API views do. Each
+profile starts from a fresh copy of the same generated database.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks import report, setup
+
+PROFILES = ("default", "tuned")
+
+
+def worker(path, profile, duration, writes_share, seed):
+    """Run the workload until ``duration`` expires and return counters."""
+    os.environ["SQLITE_PATH"] = path
+    os.environ["SQLITE_PROFILE"] = profile
+    setup()
+
+    from django.db import OperationalError, transaction
+
+    from favorites.models import Favorite
+    from recipes.models import Recipe
+    from users.models import User
+
+    rng = random.Random(seed)
+    user_ids = list(User.objects.values_list("id", flat=True))
+    recipe_ids = list(Recipe.objects.values_list("id", flat=True))
+    reads = writes = locked = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            if rng.random() < writes_share:
+                user_id = rng.choice(user_ids)
+                recipe_id = rng.choice(recipe_ids)
+                with transaction.atomic():
+                    favorite = Favorite.objects.filter(
+                        user_id=user_id,
+                        recipe_id=recipe_id,
+                    )
+                    if favorite.exists():
+                        favorite.delete()
+                    else:
+                        Favorite.objects.create(
+                            user_id=user_id,
+                            recipe_id=recipe_id,
+                        )
+                writes += 1
+            else:
+                offset = rng.randrange(0, len(recipe_ids) - 10)
+                list(
+                    Recipe.objects.order_by("name")
+                    .select_related("author")
+                    .prefetch_related("tags")[offset:offset + 10],
+                )
+                reads += 1
+        except OperationalError:
+            locked += 1
+    return reads, writes, locked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--recipes", type=int, default=5000)
+    parser.add_argument(
+        "--writes",
+        type=float,
+        default=0.3,
+        help="Share of write transactions",
+    )
+    options = parser.parse_args()
+    directory = tempfile.mkdtemp(prefix="foodgram-sqlite-")
+    base = os.path.join(directory, "base.sqlite3")
+    os.environ["SQLITE_PATH"] = base
+    os.environ["SQLITE_PROFILE"] = "default"
+    setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    from benchmarks.data import create_dataset
+
+    try:
+        call_command("migrate", verbosity=0)
+        create_dataset(users=200, recipes=options.recipes)
+        connection.close()
+        context = multiprocessing.get_context("spawn")
+        rows = []
+        for profile in PROFILES:
+            path = os.path.join(directory, f"{profile}.sqlite3")
+            shutil.copyfile(base, path)
+            with context.Pool(options.workers) as pool:
+                results = pool.starmap(
+                    worker,
+                    [
+                        (
+                            path,
+                            profile,
+                            options.duration,
+                            options.writes,
+                            seed,
+                        )
+                        for seed in range(options.workers)
+                    ],
+                )
+            reads, writes, locked = map(sum, zip(*results))
+            rows.append(
+                (
+                    profile,
+                    f"{reads / options.duration:8,.0f} reads/s "
+                    f"{writes / options.duration:8,.0f} writes/s "
+                    f"{locked:6} locked errors",
+                ),
+            )
+    finally:
+        shutil.rmtree(directory)
+    report(
+        f"SQLite, {options.workers} workers, {options.duration:g} s, "
+        f"{options.writes:.0%} writes",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
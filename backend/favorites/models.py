@@ -6,6 +6,8 @@ class Favorite(models.Model):
         "users.User",
         on_delete=models.CASCADE,
         related_name="shopping_cart",
+        # Covered by the unique (user, recipe) index.
+        db_index=False,
     )
     recipe = models.ForeignKey(
         "recipes.Recipe",
@@ -14,7 +16,6 @@ class Favorite(models.Model):
     )
 
     class Meta:
-        unique_together = ("user", "recipe")
         constraints = [
             models.UniqueConstraint(
                 fields=["user", "recipe"],
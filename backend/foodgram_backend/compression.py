@@ -0,0 +1,130 @@
+import gzip
+
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Only JSON is compressed: HTML pages carry CSRF tokens, which
+# compression would expose to BREACH-style attacks.
+COMPRESSIBLE_TYPES = ("application/json",)
+
+# Levels for responses compressed per request and for cached bodies
+# compressed once.
+GZIP_LEVEL = 6
+GZIP_CACHED_LEVEL = 9
+BROTLI_QUALITY = 4
+BROTLI_CACHED_QUALITY = 11
+
+
+def available_encodings():
+    """Return supported content codings, preferred first."""
+    return ("br", "gzip") if brotli else ("gzip",)
+
+
+def _rejects(param):
+    name, _, value = param.partition("=")
+    try:
+        return name.strip().lower() == "q" and float(value) == 0
+    except ValueError:
+        return False
+
+
+def accepted_encoding(request, available=None):
+    """Return the preferred coding of ``available`` the client accepts."""
+    accepted = set()
+    rejected = set()
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if any(_rejects(param) for param in params):
+            rejected.add(coding.lower())
+        else:
+            accepted.add(coding.lower())
+    if available is None:
+        available = available_encodings()
+    for encoding in available:
+        if encoding in accepted or (
+            "*" in accepted and encoding not in rejected
+        ):
+            return encoding
+    return None
+
+
+def compress(content, encoding, cached=False):
+    """Compress ``content`` with a coding from ``available_encodings``."""
+    if encoding == "br":
+        return brotli.compress(
+            content,
+            quality=BROTLI_CACHED_QUALITY if cached else BROTLI_QUALITY,
+        )
+    return gzip.compress(
+        content,
+        compresslevel=GZIP_CACHED_LEVEL if cached else GZIP_LEVEL,
+        mtime=0,
+    )
+
+
+def compressible(response):
+    content_type = response.get("Content-Type", "").split(";")[0].strip()
+    return (
+        content_type in COMPRESSIBLE_TYPES
+        and not response.streaming
+        and not response.has_header("Content-Encoding")
+    )
+
+
+def compress_response(request, response, min_size):
+    """Compress a JSON response of at least ``min_size`` bytes in place."""
+    if not compressible(response):
+        return response
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if len(response.content) < min_size:
+        return response
+    encoding = accepted_encoding(request)
+    if encoding is None:
+        return response
+    content = compress(response.content, encoding)
+    if len(content) >= len(response.content):
+        return response
+    response.content = content
+    response["Content-Length"] = str(len(content))
+    response["Content-Encoding"] = encoding
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response["ETag"] = "W/" + etag
+    return response
+
+
+def encoded_variants(content, min_size):
+    """
+    Return ``content`` with its compressed copies keyed by coding.
+
+    The identity copy is keyed by an empty string. Contents smaller than
+    ``min_size``, or 0 to disable compression, get no compressed copies.
+    """
+    variants = {"": content}
+    if min_size and len(content) >= min_size:
+        for encoding in available_encodings():
+            compressed = compress(content, encoding, cached=True)
+            if len(compressed) < len(content):
+                variants[encoding] = compressed
+    return variants
+
+
+def variant_response(request, variants, content_type):
+    """Return a response with the variant of ``variants`` best for request."""
+    encoding = accepted_encoding(
+        request,
+        [encoding for encoding in variants if encoding],
+    )
+    response = HttpResponse(
+        variants[encoding or ""],
+        content_type=content_type,
+    )
+    if encoding:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_wrappers = ContextVar("execute_wrappers", default=())
+
+
+def _execute(execute, sql, params, many, context):
+    for wrapper in reversed(_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def _install(connection):
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+@receiver(connection_created)
+def install_execute_wrapper(sender, connection, **kwargs):
+    _install(connection)
+
+
+@contextmanager
+def execute_wrapper(wrapper):
+    """
+    Run ``wrapper`` around every query executed in the current context.
+
+    Unlike ``connection.execute_wrapper`` this covers all databases and
+    follows the context into the threads the async ORM runs queries in,
+    where connections are not the ones of the calling thread.
+    """
+    for alias in connections:
+        _install(connections[alias])
+    token = _wrappers.set((*_wrappers.get(), wrapper))
+    try:
+        yield
+    finally:
+        _wrappers.reset(token)
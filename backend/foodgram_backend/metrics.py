@@ -0,0 +1,66 @@
+import os
+from contextvars import ContextVar
+
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+UNMATCHED_VIEW = "unmatched"
+
+current_view = ContextVar("current_view", default=UNMATCHED_VIEW)
+
+REQUESTS = Counter(
+    "foodgram_requests_total",
+    "Requests by view action, method and status code.",
+    ("view", "method", "status"),
+)
+LATENCY = Histogram(
+    "foodgram_request_duration_seconds",
+    "Request duration by view action.",
+    ("view",),
+    buckets=(
+        0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5,
+        10,
+    ),
+)
+QUERIES = Histogram(
+    "foodgram_request_queries",
+    "Database queries per request by view action.",
+    ("view",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+CACHE = Counter(
+    "foodgram_cache_requests_total",
+    "Cache lookups by cache, view action and result.",
+    ("cache", "view", "result"),
+)
+
+
+def record_cache(name, hit):
+    """Count a lookup in the cache ``name`` for the current view."""
+    CACHE.labels(name, current_view.get(), "hit" if hit else "miss").inc()
+
+
+def metrics_view(request):
+    """
+    Return all metrics in the Prometheus text format.
+
+    When PROMETHEUS_MULTIPROC_DIR is set, values written by every worker
+    process to that directory are aggregated.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry),
+        content_type=CONTENT_TYPE_LATEST,
+    )
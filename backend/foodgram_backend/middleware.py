@@ -0,0 +1,493 @@
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics, sql
+from .compression import compress_response
+from .db import execute_wrapper
+from .nplusone import detect_n_plus_one
+from .routers import ReplicaState, replica_state
+
+slow_query_logger = logging.getLogger("foodgram.slow_queries")
+nplusone_logger = logging.getLogger("foodgram.nplusone")
+
+logger = logging.getLogger("foodgram.requests")
+
+current_timings = ContextVar("current_timings", default=None)
+
+
+class RequestTimings:
+    """Time spent by a single request, split by phase."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.serialize_time = 0.0
+        self.render_started = None
+        self.render_time = 0.0
+        self.total = None
+        self._serializer_depth = 0
+
+    def execute(self, execute, sql, params, many, context):
+        """Database execute wrapper counting queries and their time."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_queries += 1
+
+    def serialize(self, func, *args):
+        """Run ``func`` counting its time, minus queries, as serializing."""
+        if self._serializer_depth:
+            return func(*args)
+        self._serializer_depth += 1
+        started = time.perf_counter()
+        db_time = self.db_time
+        try:
+            return func(*args)
+        finally:
+            self._serializer_depth -= 1
+            self.serialize_time += (
+                time.perf_counter() - started - (self.db_time - db_time)
+            )
+
+    def render(self, func, *args):
+        """Run ``func`` counting its time as rendering."""
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.render_time += time.perf_counter() - started
+
+    def start_render(self, response):
+        self.render_started = time.perf_counter()
+        response.add_post_render_callback(self.finish_render)
+
+    def finish_render(self, response):
+        self.render_time = time.perf_counter() - self.render_started
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            "view": self.view,
+            "total_ms": round(self.total * 1000, 3),
+            "db_ms": round(self.db_time * 1000, 3),
+            "db_queries": self.db_queries,
+            "serialize_ms": round(self.serialize_time * 1000, 3),
+            "render_ms": round(self.render_time * 1000, 3),
+        }
+
+    def server_timing(self):
+        """Return the value of the Server-Timing header."""
+        return ", ".join(
+            (
+                f'db;dur={self.db_time * 1000:.3f};'
+                f'desc="{self.db_queries} queries"',
+                f"serialize;dur={self.serialize_time * 1000:.3f}",
+                f"render;dur={self.render_time * 1000:.3f}",
+                f"total;dur={self.total * 1000:.3f}",
+            ),
+        )
+
+
+def view_name(view_func, request):
+    """Return a name like ``RecipeViewSet.list`` for a resolved view."""
+    cls = getattr(view_func, "cls", None)
+    if cls is None:
+        return getattr(view_func, "__name__", repr(view_func))
+    actions = getattr(view_func, "actions", None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f"{cls.__name__}.{action}"
+
+
+_timed_classes = {}
+
+
+def _timed_class(cls):
+    timed = _timed_classes.get(cls)
+    if timed is None:
+        fget = cls.data.fget
+
+        def data(self):
+            timings = current_timings.get()
+            if timings is None:
+                return fget(self)
+            return timings.serialize(fget, self)
+
+        timed = type(cls.__name__, (cls,), {"data": property(data)})
+        _timed_classes[cls] = timed
+    return timed
+
+
+def timed_serializer(serializer):
+    """
+    Count building the ``data`` of ``serializer`` as serializing.
+
+    Only serializers of measured requests are changed, to a cached
+    subclass whose ``data`` reports to the request timings.
+    """
+    if current_timings.get() is not None:
+        serializer.__class__ = _timed_class(type(serializer))
+    return serializer
+
+
+class SerializerTimingMixin:
+    """Report the serializers of a view set to RequestTimingMiddleware."""
+
+    def get_serializer(self, *args, **kwargs):
+        return timed_serializer(super().get_serializer(*args, **kwargs))
+
+
+class WrappingMiddleware:
+    """
+    Base of middleware running code around the rest of the chain.
+
+    Subclasses implement ``around(request, call)``, a context manager
+    during which ``call.response`` is produced, so the same code serves
+    both WSGI and ASGI handlers.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        call = SimpleNamespace(response=None)
+        with self.around(request, call):
+            call.response = self.get_response(request)
+        return call.response
+
+    async def __acall__(self, request):
+        call = SimpleNamespace(response=None)
+        with self.around(request, call):
+            call.response = await self.get_response(request)
+        return call.response
+
+    def around(self, request, call):
+        raise NotImplementedError
+
+
+class RequestTimingMiddleware(WrappingMiddleware):
+    """
+    Measure database, serializer, rendering and total time of requests.
+
+    A share of requests set by REQUEST_TIMING_SAMPLE_RATE is measured and
+    logged as JSON to the ``foodgram.requests`` logger, tagged with the
+    view name and action. With REQUEST_TIMING_HEADER the timings are also
+    returned in a Server-Timing header. Requests that are not sampled
+    only pay for one random number.
+    """
+
+    @contextmanager
+    def around(self, request, call):
+        sample_rate = settings.REQUEST_TIMING_SAMPLE_RATE
+        if not sample_rate or random.random() >= sample_rate:
+            yield
+            return
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with execute_wrapper(timings.execute):
+                yield
+        finally:
+            current_timings.reset(token)
+        timings.finish()
+        response = call.response
+        if settings.REQUEST_TIMING_HEADER:
+            response["Server-Timing"] = timings.server_timing()
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    **timings.as_dict(),
+                },
+            ),
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = current_timings.get()
+        if timings is not None:
+            timings.view = view_name(view_func, request)
+
+    def process_template_response(self, request, response):
+        timings = current_timings.get()
+        if timings is not None:
+            timings.start_render(response)
+        return response
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware(WrappingMiddleware):
+    """
+    Record request count, latency and query count per view action.
+
+    Requests to unknown URLs are grouped under a single ``unmatched`` view
+    so that the number of label values stays bounded.
+    """
+
+    @contextmanager
+    def around(self, request, call):
+        if not settings.METRICS_ENABLED:
+            yield
+            return
+        started = time.perf_counter()
+        queries = QueryCounter()
+        token = metrics.current_view.set(metrics.UNMATCHED_VIEW)
+        try:
+            with execute_wrapper(queries):
+                yield
+            view = metrics.current_view.get()
+        finally:
+            metrics.current_view.reset(token)
+        metrics.REQUESTS.labels(
+            view,
+            request.method,
+            call.response.status_code,
+        ).inc()
+        metrics.LATENCY.labels(view).observe(time.perf_counter() - started)
+        metrics.QUERIES.labels(view).observe(queries.count)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if settings.METRICS_ENABLED:
+            metrics.current_view.set(view_name(view_func, request))
+
+
+class SlowQueryRecorder:
+    """
+    Database execute wrapper logging queries slower than a threshold.
+
+    Each slow query is written as a JSON line with its parameters, the
+    view that ran it and the plan returned by EXPLAIN on the same
+    connection.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.view = None
+        self._explaining = False
+
+    def __call__(self, execute, query, params, many, context):
+        if self._explaining:
+            return execute(query, params, many, context)
+        started = time.perf_counter()
+        result = execute(query, params, many, context)
+        duration = time.perf_counter() - started
+        if duration >= self.threshold:
+            self.record(context["connection"], query, params, many, duration)
+        return result
+
+    def explain(self, connection, query, params):
+        prefix = connection.ops.explain_query_prefix()
+        self._explaining = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"{prefix} {query}", params)
+                return [
+                    " ".join(str(value) for value in row)
+                    for row in cursor.fetchall()
+                ]
+        except Exception as error:  # noqa: BLE001
+            return [f"EXPLAIN failed: {error}"]
+        finally:
+            self._explaining = False
+
+    def record(self, connection, query, params, many, duration):
+        plan = None
+        if not many and not connection.needs_rollback:
+            plan = self.explain(connection, query, params)
+        slow_query_logger.warning(
+            json.dumps(
+                {
+                    "time": datetime.now(timezone.utc).isoformat(),
+                    "database": connection.alias,
+                    "view": self.view,
+                    "duration_ms": round(duration * 1000, 3),
+                    "sql": query,
+                    "shape": sql.normalize(query),
+                    "params": params,
+                    "many": many,
+                    "plan": plan,
+                },
+                default=str,
+            ),
+        )
+
+
+class SlowQueryMiddleware(WrappingMiddleware):
+    """
+    Log queries slower than SLOW_QUERY_THRESHOLD_MS with their plans.
+
+    The log is summarized by the ``slow_queries`` management command.
+    """
+
+    @contextmanager
+    def around(self, request, call):
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if not threshold:
+            yield
+            return
+        recorder = request.slow_query_recorder = SlowQueryRecorder(
+            threshold / 1000,
+        )
+        with execute_wrapper(recorder):
+            yield
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        recorder = getattr(request, "slow_query_recorder", None)
+        if recorder is not None:
+            recorder.view = view_name(view_func, request)
+
+
+class NPlusOneMiddleware(WrappingMiddleware):
+    """
+    Report query shapes repeated more than NPLUSONE_THRESHOLD times.
+
+    NPLUSONE_MODE selects the behaviour: ``sample`` checks a share of
+    requests set by NPLUSONE_SAMPLE_RATE and logs the repetitions with
+    the serializer field and code location running them, ``strict``
+    checks every request and raises NPlusOneError, ``off`` does nothing.
+    """
+
+    @contextmanager
+    def around(self, request, call):
+        mode = settings.NPLUSONE_MODE
+        if mode == "strict":
+            with detect_n_plus_one(strict=True):
+                yield
+            return
+        if mode != "sample" or random.random() >= (
+            settings.NPLUSONE_SAMPLE_RATE
+        ):
+            yield
+            return
+        with detect_n_plus_one(strict=False) as repetitions:
+            yield
+        for repetition in repetitions:
+            nplusone_logger.warning(
+                json.dumps(
+                    {
+                        "method": request.method,
+                        "path": request.path,
+                        "view": getattr(request, "view_name", None),
+                        **repetition.as_dict(),
+                    },
+                ),
+            )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if settings.NPLUSONE_MODE != "off":
+            request.view_name = view_name(view_func, request)
+
+
+class ReplicaRoutingMiddleware(WrappingMiddleware):
+    """
+    Allow ReplicaRouter to read from replicas in safe-method requests.
+
+    A request whose replica read failed with an OperationalError is run
+    again with all reads on the primary. After a request writes, the
+    response sets a cookie that keeps the client's reads on the primary
+    for REPLICA_PIN_TIMEOUT seconds, so the following pages show the
+    change even while the replicas lag behind.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+    PIN_COOKIE = "primary_reads_until"
+
+    def _state(self, request):
+        try:
+            pinned = float(request.COOKIES[self.PIN_COOKIE]) > time.time()
+        except (KeyError, ValueError):
+            pinned = False
+        return ReplicaState(
+            allowed=request.method in self.SAFE_METHODS and not pinned,
+        )
+
+    def _pin(self, state, response):
+        timeout = settings.REPLICA_PIN_TIMEOUT
+        if state.wrote and timeout and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                self.PIN_COOKIE,
+                str(time.time() + timeout),
+                max_age=timeout,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self._state(request)
+        token = replica_state.set(state)
+        try:
+            response = self.get_response(request)
+            if state.failed:
+                state.use_primary()
+                response = self.get_response(request)
+        finally:
+            replica_state.reset(token)
+        return self._pin(state, response)
+
+    async def __acall__(self, request):
+        state = self._state(request)
+        token = replica_state.set(state)
+        try:
+            response = await self.get_response(request)
+            if state.failed:
+                state.use_primary()
+                response = await self.get_response(request)
+        finally:
+            replica_state.reset(token)
+        return self._pin(state, response)
+
+
+class CompressionMiddleware(WrappingMiddleware):
+    """
+    Compress JSON responses of at least COMPRESSION_MIN_SIZE bytes.
+
+    Brotli is preferred when the ``brotli`` package is installed and the
+    client accepts it, gzip otherwise. Responses that already have a
+    Content-Encoding, such as precompressed cached ones, are left as is.
+    """
+
+    @contextmanager
+    def around(self, request, call):
+        yield
+        if settings.COMPRESSION_MIN_SIZE:
+            compress_response(
+                request,
+                call.response,
+                settings.COMPRESSION_MIN_SIZE,
+            )
@@ -0,0 +1,136 @@
+import inspect
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+from . import sql
+from .db import execute_wrapper
+
+INSTRUMENTATION_DIR = str(Path(__file__).resolve().parent)
+
+
+class NPlusOneError(Exception):
+    """Raised in strict mode when a query shape repeats too often."""
+
+
+class Repetition:
+    """A query shape repeated within one request."""
+
+    def __init__(self, shape, serializer_field, location):
+        self.shape = shape
+        self.serializer_field = serializer_field
+        self.location = location
+        self.count = 0
+
+    def __str__(self):
+        return (
+            f"{self.count} queries of shape {self.shape!r} "
+            f"from {self.serializer_field or 'unknown field'} "
+            f"at {self.location or 'unknown location'}"
+        )
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "shape": self.shape,
+            "serializer_field": self.serializer_field,
+            "location": self.location,
+        }
+
+
+def _location(filename, lineno, name):
+    path = Path(filename)
+    if path.is_relative_to(settings.BASE_DIR):
+        path = path.relative_to(settings.BASE_DIR)
+    return f"{path}:{lineno} in {name}"
+
+
+def _culprit():
+    """
+    Return the serializer field and project code line running a query.
+
+    The field is taken from the innermost ``to_representation`` frame of
+    a serializer iterating over its fields. When no project code runs
+    between that frame and the query, as for plain model fields, the
+    serializer class is reported as the location.
+    """
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    location = None
+    while frame is not None:
+        code = frame.f_code
+        if (
+            code.co_name == "to_representation"
+            and "field" in frame.f_locals
+            and "self" in frame.f_locals
+        ):
+            serializer = type(frame.f_locals["self"])
+            field = frame.f_locals["field"]
+            if location is None:
+                _, lineno = inspect.getsourcelines(serializer)
+                location = _location(
+                    inspect.getsourcefile(serializer),
+                    lineno,
+                    serializer.__name__,
+                )
+            return f"{serializer.__name__}.{field.field_name}", location
+        if (
+            location is None
+            and code.co_filename.startswith(base_dir)
+            and not code.co_filename.startswith(INSTRUMENTATION_DIR)
+            and Path(code.co_filename).name != "manage.py"
+        ):
+            location = _location(
+                code.co_filename,
+                frame.f_lineno,
+                code.co_name,
+            )
+        frame = frame.f_back
+    return None, location
+
+
+class ShapeCounter:
+    """Database execute wrapper counting queries by their shape."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = Counter()
+        self.repetitions = {}
+
+    def __call__(self, execute, query, params, many, context):
+        shape = sql.normalize(query)
+        self.counts[shape] += 1
+        if self.counts[shape] > self.threshold:
+            repetition = self.repetitions.get(shape)
+            if repetition is None:
+                repetition = self.repetitions[shape] = Repetition(
+                    shape,
+                    *_culprit(),
+                )
+            repetition.count = self.counts[shape]
+        return execute(query, params, many, context)
+
+
+@contextmanager
+def detect_n_plus_one(threshold=None, strict=True):
+    """
+    Detect query shapes run more than ``threshold`` times in the block.
+
+    Yields a list filled with ``Repetition`` objects when the block
+    exits. In strict mode NPlusOneError is raised instead.
+    """
+    if threshold is None:
+        threshold = settings.NPLUSONE_THRESHOLD
+    counter = ShapeCounter(threshold)
+    repetitions = []
+    with execute_wrapper(counter):
+        yield repetitions
+    repetitions.extend(counter.repetitions.values())
+    if strict and repetitions:
+        raise NPlusOneError(
+            "Repeated queries detected:\n"
+            + "\n".join(str(repetition) for repetition in repetitions),
+        )
@@ -0,0 +1,123 @@
+import logging
+import random
+import sys
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.signals import got_request_exception
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    DatabaseError,
+    OperationalError,
+    connections,
+)
+from django.dispatch import receiver
+
+logger = logging.getLogger("foodgram.db")
+
+# Seconds a replica that failed to connect is skipped.
+REPLICA_RETRY_AFTER = 30
+
+
+class ReplicaState:
+    """Where reads of the current request go."""
+
+    def __init__(self, allowed):
+        # Whether reads may go to a replica.
+        self.allowed = allowed
+        # The database all replica reads of the request use, chosen on
+        # the first read so the request sees a single snapshot.
+        self.alias = None
+        self.wrote = False
+        # A replica read failed and the request has to run on the primary.
+        self.failed = False
+
+    def use_primary(self):
+        self.allowed = False
+        self.failed = False
+
+
+replica_state = ContextVar("replica_state", default=None)
+
+_unavailable_until = {}
+
+
+def _mark_unavailable(alias, error):
+    logger.warning("Replica %s is unavailable: %s", alias, error)
+    _unavailable_until[alias] = time.monotonic() + REPLICA_RETRY_AFTER
+
+
+def _available(alias):
+    if _unavailable_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError as error:
+        _mark_unavailable(alias, error)
+        return False
+    _unavailable_until.pop(alias, None)
+    return True
+
+
+def _choose_replica():
+    replicas = list(settings.DATABASE_REPLICAS)
+    random.shuffle(replicas)
+    for alias in replicas:
+        if _available(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+@receiver(got_request_exception)
+def fall_back_to_primary(sender, request, **kwargs):
+    """Have a request that failed reading from a replica run again."""
+    state = replica_state.get()
+    error = sys.exc_info()[1]
+    if (
+        state is None
+        or state.alias in (None, DEFAULT_DB_ALIAS)
+        or not isinstance(error, OperationalError)
+    ):
+        return
+    _mark_unavailable(state.alias, error)
+    state.failed = True
+
+
+class ReplicaRouter:
+    """
+    Send reads of safe-method requests to the DATABASE_REPLICAS aliases.
+
+    ReplicaRoutingMiddleware allows replicas for GET, HEAD and OPTIONS
+    requests only. A request reads from one replica, chosen at random.
+    Once it writes, or while the primary is inside a transaction, its
+    reads stay on the primary so they see its own writes. Replicas that
+    cannot be connected to or fail a query are skipped for
+    REPLICA_RETRY_AFTER seconds. Outside requests everything uses the
+    primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = replica_state.get()
+        if (
+            state is None
+            or not state.allowed
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        if state.alias is None:
+            state.alias = _choose_replica()
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = replica_state.get()
+        if state is not None:
+            state.allowed = False
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
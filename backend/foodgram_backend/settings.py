@@ -13,6 +13,12 @@ environ.Env.read_env()
 
 SECRET_KEY = os.getenv("SECRET_KEY", get_random_secret_key())
 
+# Key of the short link permutation; changing it changes every new code.
+SHORT_LINK_KEY = os.getenv("SHORT_LINK_KEY", "foodgram-short-links")
+
+# Lifetime of cached short link resolutions and redirects, 0 disables.
+SHORT_LINK_CACHE_TIMEOUT = int(os.getenv("SHORT_LINK_CACHE_TIMEOUT", "3600"))
+
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
 CSRF_TRUSTED_ORIGINS = os.getenv("CSRF_TRUSTED_ORIGINS", "*").split(",")
@@ -41,6 +47,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "foodgram_backend.middleware.MetricsMiddleware",
+    "foodgram_backend.middleware.RequestTimingMiddleware",
+    "foodgram_backend.middleware.SlowQueryMiddleware",
+    "foodgram_backend.middleware.NPlusOneMiddleware",
+    "foodgram_backend.middleware.ReplicaRoutingMiddleware",
+    "foodgram_backend.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -70,18 +82,120 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "foodgram_backend.wsgi.application"
 
-DATABASES = {
-    "default": {
-        # "ENGINE": "django.db.backends.postgresql",
-        # "NAME": os.environ.get("POSTGRES_DB", "postgres"),
-        # "USER": os.environ.get("POSTGRES_USER", "postgres"),
-        # "PASSWORD": os.environ.get("POSTGRES_PASSWORD", "postgres"),
-        # "HOST": os.environ.get("DB_HOST", "db"),
-        # "PORT": os.environ.get("DB_PORT", "5432"),
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    },
+# Serve the main read endpoints with async views; only useful when the
+# application runs under an ASGI server (foodgram_backend.asgi).
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False").lower() == "true"
+
+# sqlite (default) or postgresql.
+DB_ENGINE = os.getenv("DB_ENGINE", "sqlite").lower()
+
+if DB_ENGINE == "postgresql":
+    # Maximum connections of each worker process kept by the pool,
+    # 0 disables the pool in favour of persistent connections.
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "0"))
+    DB_OPTIONS = {}
+    # Queries running longer than this many milliseconds are cancelled.
+    DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", "30000"))
+    if DB_STATEMENT_TIMEOUT:
+        DB_OPTIONS["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"
+    if DB_POOL_MAX_SIZE:
+        DB_OPTIONS["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        }
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("POSTGRES_DB", "postgres"),
+            "USER": os.getenv("POSTGRES_USER", "postgres"),
+            "PASSWORD": os.getenv("POSTGRES_PASSWORD", "postgres"),
+            "HOST": os.getenv("DB_HOST", "db"),
+            "PORT": os.getenv("DB_PORT", "5432"),
+            # Seconds a connection is reused across requests; the pool
+            # manages connections itself and requires 0.
+            "CONN_MAX_AGE": (
+                0
+                if DB_POOL_MAX_SIZE
+                else int(os.getenv("DB_CONN_MAX_AGE", "60"))
+            ),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": DB_OPTIONS,
+        },
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH", str(BASE_DIR / "db.sqlite3")),
+        },
+    }
+    # tuned (default) or default, the SQLite defaults.
+    if os.getenv("SQLITE_PROFILE", "tuned").lower() == "tuned":
+        DATABASES["default"]["OPTIONS"] = {
+            # Write-ahead log: readers do not block the writer; with it
+            # synchronous=NORMAL is durable against application crashes.
+            "init_command": (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                f"PRAGMA mmap_size={256 * 1024 * 1024};"
+                # Negative values are in KiB: 64 MB of page cache.
+                "PRAGMA cache_size=-65536;"
+                "PRAGMA temp_store=MEMORY"
+            ),
+            # Take the write lock when a transaction starts, so that
+            # waiting for it honours the busy timeout instead of failing
+            # with "database is locked" on upgrade from a read lock.
+            "transaction_mode": "IMMEDIATE",
+            # Seconds to wait for the write lock.
+            "timeout": float(os.getenv("SQLITE_BUSY_TIMEOUT", "20")),
+        }
+
+# Read replicas: comma-separated host[:port] of PostgreSQL replicas, or
+# SQLite files for local testing. Safe-method requests read from them.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(
+    filter(
+        None,
+        os.getenv(
+            "DB_REPLICA_HOSTS" if DB_ENGINE == "postgresql"
+            else "SQLITE_REPLICA_PATHS",
+            "",
+        ).split(","),
+    ),
+    start=1,
+):
+    alias = f"replica{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "TEST": {"MIRROR": "default"},
+    }
+    if DB_ENGINE == "postgresql":
+        host, _, port = replica.partition(":")
+        DATABASES[alias].update(HOST=host, PORT=port or "5432")
+    else:
+        DATABASES[alias]["NAME"] = replica
+    DATABASE_REPLICAS.append(alias)
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["foodgram_backend.routers.ReplicaRouter"]
+
+# Seconds a client reads from the primary after a write, covering the
+# replication lag; 0 only keeps the writing request on the primary.
+REPLICA_PIN_TIMEOUT = int(os.getenv("REPLICA_PIN_TIMEOUT", "10"))
+
+# A cache shared by all workers, e.g. redis://redis:6379/1 (needs the
+# redis package) or filecache:///var/tmp/foodgram_cache.
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
 }
+# Entries of these backends are private to each worker process, so a
+# change invalidated in one worker stays cached in the others.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+SHARED_CACHE = CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -109,6 +223,29 @@ USE_TZ = True
 MEDIA_URL = "/media/"
 MEDIA_ROOT = "/media"
 
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "content": {
+        "BACKEND": "recipes.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Largest accepted image upload in bytes, checked while the body is read.
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(10 * 1024 * 1024)))
+
+FILE_UPLOAD_HANDLERS = [
+    "api.v1.uploadhandlers.MaxSizeUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+# Background threads generating resized image variants, 0 runs inline.
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "2"))
+
 STATIC_URL = "static/"
 STATIC_ROOT = "/backend_static/static"
 
@@ -124,11 +261,75 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.v1.authentication.CachedTokenAuthentication",
         # "rest_framework_simplejwt.authentication.JWTAuthentication",
     ],
+    # orjson based, with the stdlib json when orjson is not installed.
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.v1.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.v1.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
+# Lifetime of cached token authentication results, 0 disables caching.
+# Off without a shared cache: other workers would keep accepting a token
+# deleted on logout.
+TOKEN_CACHE_TIMEOUT = (
+    int(os.getenv("TOKEN_CACHE_TIMEOUT", "300")) if SHARED_CACHE else 0
+)
+
+# Lifetime of cached tag and ingredient lists, 0 disables caching.
+# Off without a shared cache: an edit would only drop the lists cached by
+# the worker that saved it.
+COLLECTION_CACHE_TIMEOUT = (
+    int(os.getenv("COLLECTION_CACHE_TIMEOUT", "3600")) if SHARED_CACHE else 0
+)
+
+# Minimum size in bytes of compressed JSON responses, 0 disables
+# compression.
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Seconds after which an addition to favorites or a shopping cart counts
+# half as much for ``ordering=trending``. Scores stored under a different
+# half-life are not comparable, so changing it skews the trend until
+# older additions have faded.
+TRENDING_HALF_LIFE = int(os.getenv("TRENDING_HALF_LIFE", str(3 * 86400)))
+
+# Share of requests measured by RequestTimingMiddleware, from 0 to 1.
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.getenv("REQUEST_TIMING_SAMPLE_RATE", "0"),
+)
+
+# Return the timings of measured requests in a Server-Timing header.
+REQUEST_TIMING_HEADER = (
+    os.getenv("REQUEST_TIMING_HEADER", "False").lower() == "true"
+)
+
+# Collect request metrics exported at /metrics.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+
+# Log queries slower than this many milliseconds with their plans,
+# 0 disables the slow query log.
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "0"))
+
+SLOW_QUERY_LOG = os.getenv(
+    "SLOW_QUERY_LOG",
+    str(BASE_DIR / "slow_queries.log"),
+)
+
+# Detection of repeated queries: off, sample (log) or strict (raise).
+NPLUSONE_MODE = os.getenv("NPLUSONE_MODE", "off").lower()
+
+NPLUSONE_SAMPLE_RATE = float(os.getenv("NPLUSONE_SAMPLE_RATE", "0.01"))
+
+# Number of queries of the same shape allowed in one request.
+NPLUSONE_THRESHOLD = int(os.getenv("NPLUSONE_THRESHOLD", "5"))
+
 DJOSER = {
     "LOGIN_FIELD": "email",
     "SEND_ACTIVATION_EMAIL": False,
@@ -152,3 +353,29 @@ DJOSER = {
 DEFAULT_FROM_EMAIL = "no-reply@example.com"
 
 APPEND_SLASH = True
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+        "slow_queries": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": SLOW_QUERY_LOG,
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": 5,
+            "delay": True,
+        },
+    },
+    "loggers": {
+        "foodgram": {
+            "handlers": ["console"],
+            "level": os.getenv("FOODGRAM_LOG_LEVEL", "INFO"),
+        },
+        "foodgram.slow_queries": {
+            "handlers": ["slow_queries"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
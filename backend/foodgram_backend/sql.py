@@ -0,0 +1,23 @@
+import re
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"%s|\?")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES = re.compile(r"VALUES\s*\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+", re.I)
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(sql):
+    """
+    Return the shape of a query with literals and parameters replaced.
+
+    Queries differing only in values or in the length of ``IN`` lists
+    and multi-row ``VALUES`` have the same shape.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PARAMETER.sub("?", sql)
+    sql = _LIST.sub("(...)", sql)
+    sql = _VALUES.sub("VALUES (...)", sql)
+    return _SPACE.sub(" ", sql).strip()
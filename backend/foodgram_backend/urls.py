@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
-    path("s/", include("recipes.urls"))
+    path("s/", include("recipes.urls")),
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,83 @@
+"""
+Gunicorn settings of the backend, read from the working directory.
+
+Every value can be overridden with a GUNICORN_* environment variable.
+With preloading the application is imported and warmed up once in the
+master process, then ``gc.freeze()`` moves the resulting objects out of
+the garbage collector's reach, so forked workers keep sharing their
+memory pages instead of copying them on the first collection.
+"""
+
+import gc
+import os
+import time
+
+CPUS = len(os.sched_getaffinity(0))
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:9000")
+# One process per CPU and one spare, each serving GUNICORN_THREADS
+# requests at once while others wait for the database.
+workers = int(os.getenv("GUNICORN_WORKERS", CPUS + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 2))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+preload_app = os.getenv("GUNICORN_PRELOAD", "True").lower() == "true"
+# Freeze the objects of the preloaded application before forking.
+gc_freeze = os.getenv("GUNICORN_GC_FREEZE", "True").lower() == "true"
+# Restart workers after this many requests to bound memory growth,
+# spread by the jitter so they do not restart at once.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = max_requests // 10
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = timeout
+# Worker heartbeat files in memory rather than on the container overlay.
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+_started = time.monotonic()
+
+
+def _warm_up(log, who):
+    from foodgram_backend.warmup import warm_up
+
+    warmed = warm_up()
+    log.info(
+        "%s warmed up in %.3f s: %s",
+        who,
+        warmed.pop("seconds"),
+        ", ".join(f"{count} {name}" for name, count in warmed.items()),
+    )
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        _warm_up(server.log, "Master")
+        if gc_freeze:
+            gc.collect()
+            gc.freeze()
+    server.log.info(
+        "Ready in %.3f s, starting %d workers",
+        time.monotonic() - _started,
+        server.num_workers,
+    )
+
+
+def post_fork(server, worker):
+    worker.forked = time.monotonic()
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        _warm_up(worker.log, f"Worker {worker.pid}")
+    worker.log.info(
+        "Worker %s ready in %.3f s",
+        worker.pid,
+        time.monotonic() - worker.forked,
+    )
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -8,3 +8,24 @@ MAX_LENGTH_TAG_NAME = 32
 MAX_LENGTH_SLUG = 32
 MAX_RECIPE_NAME = 256
 MAX_LENGTH_SHORT_LINK = 10
+IMAGE_VARIANTS = {
+    "thumbnail": (160, 160),
+    "card": (480, 480),
+    "full": (1280, 1280),
+}
+IMAGE_VARIANT_FORMATS = {
+    "webp": ("WEBP", "webp"),
+    "jpeg": ("JPEG", "jpg"),
+}
+IMAGE_VARIANT_QUALITY = 82
+SHORT_LINK_LENGTH = 7
+SHORT_LINK_ALPHABET = (
+    "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+)
+SHORT_LINK_LOCAL_CACHE_SIZE = 10000
+SHORT_LINK_LOCAL_CACHE_TIMEOUT = 60
+SHORT_LINK_NEGATIVE_CACHE_TIMEOUT = 30
+RANKING_ORDERINGS = {
+    "popular": ("-ranking__popularity", "ranking__recipe_id"),
+    "trending": ("-ranking__trending", "ranking__recipe_id"),
+}
@@ -0,0 +1,220 @@
+import logging
+import posixpath
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .constants import (
+    IMAGE_VARIANT_FORMATS,
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANTS,
+)
+from .models import MediaFile
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = Lock()
+# Whether the variants of an image exist, with the time the answer
+# expires, kept per process: missing variants are checked again soon,
+# found ones after a while in case another process deleted them.
+_readiness = {}
+READINESS_CACHE_SIZE = 100000
+READY_TIMEOUT = 300
+NOT_READY_TIMEOUT = 10
+
+
+def variant_name(name, variant, image_format):
+    """Return the storage name of a variant of the image ``name``."""
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    extension = IMAGE_VARIANT_FORMATS[image_format][1]
+    return posixpath.join(
+        directory,
+        "variants",
+        f"{stem}_{variant}.{extension}",
+    )
+
+
+def variants_ready(name):
+    """Whether all variants of the stored image ``name`` exist."""
+    now = time.monotonic()
+    ready, expires = _readiness.get(name, (False, 0))
+    if expires > now:
+        return ready
+    ready = all(
+        default_storage.exists(variant_name(name, variant, image_format))
+        for variant in IMAGE_VARIANTS
+        for image_format in IMAGE_VARIANT_FORMATS
+    )
+    if len(_readiness) >= READINESS_CACHE_SIZE:
+        _readiness.clear()
+    _readiness[name] = (
+        ready,
+        now + (READY_TIMEOUT if ready else NOT_READY_TIMEOUT),
+    )
+    return ready
+
+
+def variant_urls(image):
+    """
+    Return variant URLs of an image field file keyed by size and format.
+
+    Variants are generated after the image is saved; until all of them
+    exist every entry points to the original image.
+    """
+    if not image:
+        return None
+    if not variants_ready(image.name):
+        url = image.url
+        return {
+            variant: dict.fromkeys(IMAGE_VARIANT_FORMATS, url)
+            for variant in IMAGE_VARIANTS
+        }
+    return {
+        variant: {
+            image_format: default_storage.url(
+                variant_name(image.name, variant, image_format),
+            )
+            for image_format in IMAGE_VARIANT_FORMATS
+        }
+        for variant in IMAGE_VARIANTS
+    }
+
+
+def _encode(image, image_format):
+    pillow_format = IMAGE_VARIANT_FORMATS[image_format][0]
+    if pillow_format == "JPEG" and image.mode == "RGBA":
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        pillow_format,
+        quality=IMAGE_VARIANT_QUALITY,
+        optimize=True,
+    )
+    return buffer.getvalue()
+
+
+def generate_variants(name, storage=None, force=False):
+    """
+    Create the resized variants of the stored image ``name``.
+
+    The original is read from ``storage`` and the variants are written to
+    the default storage. Variants that already exist are kept unless
+    ``force`` is set. Return the number of files written.
+    """
+    storage = storage or default_storage
+    targets = {
+        (variant, image_format): variant_name(name, variant, image_format)
+        for variant in IMAGE_VARIANTS
+        for image_format in IMAGE_VARIANT_FORMATS
+    }
+    if not force:
+        targets = {
+            key: target
+            for key, target in targets.items()
+            if not default_storage.exists(target)
+        }
+    if not targets:
+        return 0
+    with storage.open(name, "rb") as file:
+        original = ImageOps.exif_transpose(Image.open(file))
+        original.load()
+    transparent = "transparency" in original.info
+    if original.mode in ("LA", "P", "PA") or transparent:
+        original = original.convert("RGBA")
+    elif original.mode not in ("RGB", "RGBA"):
+        original = original.convert("RGB")
+    for variant, size in IMAGE_VARIANTS.items():
+        resized = None
+        for image_format in IMAGE_VARIANT_FORMATS:
+            target = targets.get((variant, image_format))
+            if target is None:
+                continue
+            if resized is None:
+                resized = original.copy()
+                resized.thumbnail(size, Image.Resampling.LANCZOS)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            default_storage.save(
+                target,
+                ContentFile(_encode(resized, image_format)),
+            )
+    _readiness.pop(name, None)
+    return len(targets)
+
+
+def delete_variants(name):
+    """Remove all variants of the stored image ``name``."""
+    _readiness.pop(name, None)
+    for variant in IMAGE_VARIANTS:
+        for image_format in IMAGE_VARIANT_FORMATS:
+            target = variant_name(name, variant, image_format)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_VARIANT_WORKERS,
+                thread_name_prefix="image-variants",
+            )
+    return _executor
+
+
+def schedule_variants(image):
+    """
+    Generate variants of an image field file off the request path.
+
+    The work starts after the surrounding transaction commits and runs
+    in a background thread, or inline when IMAGE_VARIANT_WORKERS is 0.
+    """
+    if not image:
+        return
+    name = image.name
+    storage = image.storage
+
+    def submit():
+        if settings.IMAGE_VARIANT_WORKERS:
+            future = _get_executor().submit(generate_variants, name, storage)
+            future.add_done_callback(log_failure)
+        else:
+            generate_variants(name, storage)
+
+    def log_failure(future):
+        if future.exception() is not None:
+            logger.error(
+                "Could not generate variants of %s",
+                name,
+                exc_info=future.exception(),
+            )
+
+    transaction.on_commit(submit)
+
+
+def release_variants(name):
+    """
+    Delete the variants of ``name`` once nothing references the image.
+
+    Runs after the surrounding transaction commits; a file that got a
+    new reference meanwhile keeps its variants. The original itself is
+    left to ``collect_media``.
+    """
+    def release():
+        if not MediaFile.objects.filter(name=name, ref_count__gt=0).exists():
+            delete_variants(name)
+
+    transaction.on_commit(release)
@@ -0,0 +1,102 @@
+import posixpath
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.images import delete_variants
+from recipes.models import MediaFile, Recipe
+from recipes.storage import content_storage
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Delete uploaded image files that are no longer referenced"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=60,
+            help="Keep files modified within this many minutes",
+        )
+        parser.add_argument(
+            "--recount",
+            action="store_true",
+            help="Rebuild reference counts from recipes and users first",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be deleted",
+        )
+
+    @transaction.atomic
+    def recount(self):
+        references = Counter(
+            Recipe.objects.exclude(image="").values_list("image", flat=True),
+        )
+        references.update(
+            User.objects.exclude(avatar="")
+            .exclude(avatar__isnull=True)
+            .values_list("avatar", flat=True),
+        )
+        media_files = list(MediaFile.objects.select_for_update())
+        for media_file in media_files:
+            media_file.ref_count = references.pop(media_file.name, 0)
+        MediaFile.objects.bulk_update(media_files, ("ref_count",))
+        MediaFile.objects.bulk_create(
+            MediaFile(name=name, ref_count=ref_count)
+            for name, ref_count in references.items()
+        )
+
+    def list_blobs(self, storage):
+        if not storage.exists(storage.prefix):
+            return
+        directories, _ = storage.listdir(storage.prefix)
+        for directory in directories:
+            path = posixpath.join(storage.prefix, directory)
+            for filename in storage.listdir(path)[1]:
+                yield posixpath.join(path, filename)
+
+    def handle(self, *args, **kwargs):
+        storage = content_storage()
+        if kwargs["recount"]:
+            self.recount()
+        threshold = timezone.now() - timedelta(minutes=kwargs["grace"])
+        tracked = set(MediaFile.objects.values_list("name", flat=True))
+        candidates = set(
+            MediaFile.objects.filter(ref_count=0).values_list(
+                "name",
+                flat=True,
+            ),
+        )
+        candidates.update(
+            name for name in self.list_blobs(storage) if name not in tracked
+        )
+        deleted = freed = 0
+        for name in sorted(candidates):
+            exists = storage.exists(name)
+            if exists and storage.get_modified_time(name) > threshold:
+                continue
+            size = storage.size(name) if exists else 0
+            if not kwargs["dry_run"]:
+                removed, _ = MediaFile.objects.filter(
+                    name=name,
+                    ref_count=0,
+                ).delete()
+                if not removed and name in tracked:
+                    continue
+                if exists:
+                    storage.delete(name)
+                delete_variants(name)
+            deleted += 1
+            freed += size
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Would delete' if kwargs['dry_run'] else 'Deleted'} "
+                f"{deleted} files, {freed / 1024 / 1024:.1f} MB",
+            ),
+        )
@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+
+from recipes.images import generate_variants
+from recipes.models import Recipe
+from recipes.storage import content_storage
+from users.models import User
+
+
+def _generate(name, force):
+    try:
+        count = generate_variants(name, content_storage(), force=force)
+        return name, count, None
+    except Exception as error:  # noqa: BLE001
+        return name, 0, str(error)
+
+
+class Command(BaseCommand):
+    help = "Generate resized variants of recipe images and user avatars"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of worker processes",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate variants that already exist",
+        )
+
+    def handle(self, *args, **kwargs):
+        names = set(
+            Recipe.objects.exclude(image="").values_list("image", flat=True),
+        )
+        names.update(
+            User.objects.exclude(avatar="")
+            .exclude(avatar__isnull=True)
+            .values_list("avatar", flat=True),
+        )
+        written = failed = 0
+        with ProcessPoolExecutor(
+            max_workers=kwargs["workers"],
+            initializer=django.setup,
+        ) as executor:
+            futures = [
+                executor.submit(_generate, name, kwargs["force"])
+                for name in sorted(names)
+            ]
+            for future in as_completed(futures):
+                name, count, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(
+                        self.style.ERROR(f"{name}: {error}"),
+                    )
+                    continue
+                written += count
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {len(names)} images, wrote {written} variants, "
+                f"{failed} failed",
+            ),
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes import rankings
+
+
+class Command(BaseCommand):
+    help = "Create missing recipe rankings and recount their popularity"
+
+    def handle(self, *args, **options):
+        changed = rankings.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated the popularity of {changed} recipes"),
+        )
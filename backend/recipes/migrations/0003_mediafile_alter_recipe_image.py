@@ -0,0 +1,62 @@
+# Generated by Django 5.1.3 on 2026-10-19 09:26
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+
+import recipes.storage
+
+
+def count_references(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    MediaFile = apps.get_model("recipes", "MediaFile")
+    references = Counter(
+        Recipe.objects.exclude(image="").values_list("image", flat=True),
+    )
+    references.update(
+        User.objects.exclude(avatar="")
+        .exclude(avatar__isnull=True)
+        .values_list("avatar", flat=True),
+    )
+    MediaFile.objects.bulk_create(
+        MediaFile(name=name, ref_count=ref_count)
+        for name, ref_count in references.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0002_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaFile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="image",
+            field=models.ImageField(
+                storage=recipes.storage.content_storage,
+                upload_to="recipes/images/",
+            ),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
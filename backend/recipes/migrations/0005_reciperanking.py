@@ -0,0 +1,67 @@
+# Generated by Django 5.1.3 on 2026-10-19 10:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def create_rankings(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeRanking = apps.get_model("recipes", "RecipeRanking")
+    popularity = dict.fromkeys(Recipe.objects.values_list("id", flat=True), 0)
+    for related_name in ("favorites", "in_carts"):
+        for recipe_id, count in (
+            Recipe.objects.annotate(count=Count(related_name))
+            .filter(count__gt=0)
+            .values_list("id", "count")
+        ):
+            popularity[recipe_id] += count
+    RecipeRanking.objects.bulk_create(
+        (
+            RecipeRanking(recipe_id=recipe_id, popularity=count)
+            for recipe_id, count in popularity.items()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0004_recipe_indexes"),
+        ("favorites", "0004_alter_favorite_unique_together_alter_favorite_user"),
+        ("shopping_lists", "0003_alter_shoppingcart_user"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeRanking",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="ranking",
+                        serialize=False,
+                        to="recipes.recipe",
+                    ),
+                ),
+                ("popularity", models.PositiveIntegerField(default=0)),
+                ("trending", models.FloatField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-popularity", "recipe"],
+                        name="ranking_popularity_idx",
+                    ),
+                    models.Index(
+                        fields=["-trending", "recipe"],
+                        name="ranking_trending_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(create_rankings, migrations.RunPython.noop),
+    ]
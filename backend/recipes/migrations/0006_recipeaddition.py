@@ -0,0 +1,76 @@
+# Generated by Django 5.1.3 on 2026-10-19 10:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_additions(apps, schema_editor):
+    RecipeAddition = apps.get_model("recipes", "RecipeAddition")
+    for model_name in ("favorites.Favorite", "shopping_lists.ShoppingCart"):
+        model = apps.get_model(model_name)
+        RecipeAddition.objects.bulk_create(
+            (
+                RecipeAddition(user_id=user_id, recipe_id=recipe_id)
+                for user_id, recipe_id in model.objects.values_list(
+                    "user_id",
+                    "recipe_id",
+                ).iterator()
+            ),
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0005_reciperanking"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("favorites", "0004_alter_favorite_unique_together_alter_favorite_user"),
+        ("shopping_lists", "0003_alter_shoppingcart_user"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeAddition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("added_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="recipes.recipe",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "recipe"),
+                        name="unique_recipe_addition",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(create_additions, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,8 @@
-import random
-import string
-
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 from users.models import User
+from . import shortlinks
 from .constants import (
     MAX_AMOUNT,
     MAX_COOKING_TIME,
@@ -17,6 +15,7 @@ from .constants import (
     MIN_AMOUNT,
     MIN_COOKING_TIME,
 )
+from .storage import content_storage
 
 
 class Ingredient(models.Model):
@@ -50,8 +49,13 @@ class Recipe(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name="recipes",
+        # Covered by the (author, name) index.
+        db_index=False,
+    )
+    image = models.ImageField(
+        upload_to="recipes/images/",
+        storage=content_storage,
     )
-    image = models.ImageField(upload_to="recipes/images/")
     text = models.TextField()
     cooking_time = models.PositiveSmallIntegerField(
         validators=[
@@ -82,28 +86,35 @@ class Recipe(models.Model):
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["name"], name="recipe_name_idx"),
+            models.Index(
+                fields=["author", "name"],
+                name="recipe_author_name_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Recipe: {self.name} by {self.author.username}"
 
-    def generate_short_link(self):
-        """Generate a unique short link."""
-        while True:
-            short_link = "".join(
-                random.choices(string.ascii_letters + string.digits, k=6),
-            )
-            if not Recipe.objects.filter(short_link=short_link).exists():
-                return short_link
+    @property
+    def short_code(self):
+        """
+        Code of the recipe short link.
 
-    def save(self, *args, **kwargs):
-        """Override save method to generate short link on creation."""
-        if not self.short_link:
-            self.short_link = self.generate_short_link()
-        super().save(*args, **kwargs)
+        Recipes that were given a random code keep it; all others use a
+        code derived from the primary key, which needs no storage.
+        """
+        return self.short_link or shortlinks.encode(self.pk)
 
 
 class RecipeIngredient(models.Model):
-    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE)
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        # Covered by the unique (recipe, ingredient) index.
+        db_index=False,
+    )
     ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
     amount = models.PositiveSmallIntegerField(
         validators=[
@@ -120,8 +131,109 @@ class RecipeIngredient(models.Model):
         ],
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "ingredient"],
+                name="unique_recipe_ingredient",
+            ),
+        ]
+
     def __str__(self):
         return (
             f"{self.amount} {self.ingredient.measurement_unit}"
             f" of {self.ingredient.name}"
         )
+
+
+class MediaFile(models.Model):
+    """Number of objects referencing an uploaded image file."""
+
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+    @classmethod
+    def add_reference(cls, name):
+        media_file, _ = cls.objects.get_or_create(name=name)
+        cls.objects.filter(pk=media_file.pk).update(
+            ref_count=models.F("ref_count") + 1,
+        )
+
+    @classmethod
+    def remove_reference(cls, name):
+        cls.objects.filter(name=name, ref_count__gt=0).update(
+            ref_count=models.F("ref_count") - 1,
+        )
+
+
+class RecipeRanking(models.Model):
+    """
+    Popularity of a recipe, updated on favorite and shopping cart changes.
+
+    ``popularity`` counts the favorites and shopping cart entries of the
+    recipe. ``trending`` is the natural logarithm of the sum of weights
+    that double every TRENDING_HALF_LIFE seconds of the time the recipe
+    was added, so it orders recipes like scores halving with age while
+    never being rewritten as time passes.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="ranking",
+    )
+    popularity = models.PositiveIntegerField(default=0)
+    trending = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-popularity", "recipe"],
+                name="ranking_popularity_idx",
+            ),
+            models.Index(
+                fields=["-trending", "recipe"],
+                name="ranking_trending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Ranking of recipe {self.recipe_id}: {self.popularity}"
+
+
+class RecipeAddition(models.Model):
+    """
+    First addition of a recipe to favorites or a cart by a user.
+
+    Rows are kept after the recipe is removed, so adding it again does
+    not raise its ``trending`` score once more.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        # Covered by the unique (user, recipe) index.
+        db_index=False,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"],
+                name="unique_recipe_addition",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Recipe {self.recipe_id} added by user {self.user_id}"
@@ -0,0 +1,172 @@
+import math
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+
+from .models import Recipe, RecipeAddition, RecipeRanking
+
+# Additions are weighted by 2 ** (half-lives since TRENDING_EPOCH).
+TRENDING_EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+# exp() of smaller values is below float precision next to 1 and
+# underflows on PostgreSQL.
+MIN_EXPONENT = -50.0
+
+_pending = ContextVar("pending_ranking_changes", default=None)
+
+
+def trending_score(when, count=1):
+    """Return the ``trending`` score of ``count`` additions at ``when``."""
+    half_lives = (
+        when - TRENDING_EPOCH
+    ).total_seconds() / settings.TRENDING_HALF_LIFE
+    return half_lives * math.log(2) + math.log(count)
+
+
+def _first_additions(user_id, recipe_ids):
+    """Store which recipes ``user_id`` adds for the first time, return them."""
+    recipe_ids = set(recipe_ids) - set(
+        RecipeAddition.objects.filter(
+            user_id=user_id,
+            recipe_id__in=recipe_ids,
+        ).values_list("recipe_id", flat=True),
+    )
+    RecipeAddition.objects.bulk_create(
+        (
+            RecipeAddition(user_id=user_id, recipe_id=recipe_id)
+            for recipe_id in recipe_ids
+        ),
+        ignore_conflicts=True,
+    )
+    return recipe_ids
+
+
+def _apply(changes, when=None):
+    now = when or datetime.now(timezone.utc)
+    groups = defaultdict(list)
+    for recipe_id in changes["added"].keys() | changes["removed"].keys():
+        key = (
+            changes["added"][recipe_id] - changes["removed"][recipe_id],
+            changes["first"][recipe_id],
+        )
+        if key != (0, 0):
+            groups[key].append(recipe_id)
+    # Recipes with the same changes are updated with one query.
+    for (difference, first), recipe_ids in groups.items():
+        values = {
+            "popularity": Greatest(F("popularity") + difference, Value(0)),
+        }
+        if first:
+            score = Value(
+                trending_score(now, first),
+                output_field=FloatField(),
+            )
+            # log(e ** trending + e ** score) without overflowing.
+            values["trending"] = Greatest(F("trending"), score) + Ln(
+                Value(1.0)
+                + Exp(
+                    Greatest(
+                        -Abs(F("trending") - score),
+                        Value(MIN_EXPONENT),
+                    ),
+                ),
+            )
+        RecipeRanking.objects.filter(recipe_id__in=recipe_ids).update(
+            **values,
+        )
+
+
+def _changes():
+    return {"added": Counter(), "removed": Counter(), "first": Counter()}
+
+
+def record(user_id, recipe_ids, added=True):
+    """
+    Count additions of recipes to favorites or shopping carts by a user.
+
+    Every addition raises the popularity, but only the first addition of
+    a recipe by the user raises its trend, so removing and adding it
+    again does not. With ``added=False`` removals are counted, which
+    lower only the popularity: the trend of a recipe fades by itself.
+    Inside ``batched`` the changes are applied when the block ends.
+    """
+    changes = _pending.get()
+    pending = changes is not None
+    if not pending:
+        changes = _changes()
+    if added:
+        changes["added"].update(recipe_ids)
+        changes["first"].update(_first_additions(user_id, recipe_ids))
+    else:
+        changes["removed"].update(recipe_ids)
+    if not pending:
+        _apply(changes)
+
+
+@contextmanager
+def batched():
+    """
+    Apply ranking changes recorded inside the block together.
+
+    Recipes with the same number of changes are updated with one query,
+    so a bulk change of many recipes costs a single update. Nothing is
+    applied if the block raises.
+    """
+    changes = _changes()
+    token = _pending.set(changes)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    _apply(changes)
+
+
+@transaction.atomic
+def rebuild():
+    """
+    Create missing rankings and recount the popularity of all recipes.
+
+    Trending scores are kept: favorites and cart entries have no time of
+    addition to compute them from. Entries without a RecipeAddition get
+    one, so adding them again does not raise the trend.
+    """
+    RecipeRanking.objects.bulk_create(
+        (
+            RecipeRanking(recipe_id=recipe_id)
+            for recipe_id in Recipe.objects.values_list("id", flat=True)
+        ),
+        ignore_conflicts=True,
+    )
+    popularity = Counter()
+    for related_name in ("favorites", "in_carts"):
+        RecipeAddition.objects.bulk_create(
+            (
+                RecipeAddition(user_id=user_id, recipe_id=recipe_id)
+                for user_id, recipe_id in Recipe.objects.filter(
+                    **{f"{related_name}__isnull": False},
+                ).values_list(f"{related_name}__user_id", "id")
+            ),
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        popularity.update(
+            dict(
+                Recipe.objects.annotate(count=Count(related_name))
+                .filter(count__gt=0)
+                .values_list("id", "count"),
+            ),
+        )
+    rankings = list(RecipeRanking.objects.select_for_update())
+    changed = []
+    for ranking in rankings:
+        count = popularity.get(ranking.recipe_id, 0)
+        if ranking.popularity != count:
+            ranking.popularity = count
+            changed.append(ranking)
+    RecipeRanking.objects.bulk_update(changed, ("popularity",), batch_size=500)
+    return len(changed)
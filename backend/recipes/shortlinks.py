@@ -0,0 +1,209 @@
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+
+from foodgram_backend.metrics import record_cache
+
+from .constants import (
+    MAX_LENGTH_SHORT_LINK,
+    SHORT_LINK_ALPHABET,
+    SHORT_LINK_LENGTH,
+    SHORT_LINK_LOCAL_CACHE_SIZE,
+    SHORT_LINK_LOCAL_CACHE_TIMEOUT,
+    SHORT_LINK_NEGATIVE_CACHE_TIMEOUT,
+)
+
+# Recipe ids are permuted inside a 40-bit domain with a balanced Feistel
+# network, which is a bijection for any round function, so codes of
+# different ids never collide. 62 ** 7 > 2 ** 40, so every code has
+# exactly SHORT_LINK_LENGTH characters and cannot clash with the 6-char
+# random codes issued before.
+HALF_BITS = 20
+HALF_MASK = (1 << HALF_BITS) - 1
+MAX_ID = (1 << (2 * HALF_BITS)) - 1
+ROUNDS = 4
+
+CACHE_KEY_PREFIX = "shortlink:"
+# Cached value of codes that do not belong to any recipe.
+MISSING = 0
+
+
+def _round(round_number, value):
+    digest = hmac.new(
+        settings.SHORT_LINK_KEY.encode(),
+        f"{round_number}:{value}".encode(),
+        hashlib.sha256,
+    ).digest()
+    return int.from_bytes(digest[:4], "big") & HALF_MASK
+
+
+def encode(recipe_id):
+    """Return the short link code of a recipe id."""
+    if not 0 < recipe_id <= MAX_ID:
+        raise ValueError(f"Recipe id {recipe_id} is out of range.")
+    left, right = recipe_id >> HALF_BITS, recipe_id & HALF_MASK
+    for round_number in range(ROUNDS):
+        left, right = right, left ^ _round(round_number, right)
+    value = (left << HALF_BITS) | right
+    code = []
+    for _ in range(SHORT_LINK_LENGTH):
+        value, index = divmod(value, len(SHORT_LINK_ALPHABET))
+        code.append(SHORT_LINK_ALPHABET[index])
+    return "".join(reversed(code))
+
+
+def decode(code):
+    """Return the recipe id of a short link code, or None if invalid."""
+    if len(code) != SHORT_LINK_LENGTH:
+        return None
+    value = 0
+    for char in code:
+        index = SHORT_LINK_ALPHABET.find(char)
+        if index < 0:
+            return None
+        value = value * len(SHORT_LINK_ALPHABET) + index
+    if value > MAX_ID:
+        return None
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for round_number in reversed(range(ROUNDS)):
+        left, right = right ^ _round(round_number, left), left
+    recipe_id = (left << HALF_BITS) | right
+    return recipe_id or None
+
+
+class LocalCache:
+    """Thread-safe in-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalCache(SHORT_LINK_LOCAL_CACHE_SIZE)
+
+
+def _is_valid_code(code):
+    return 0 < len(code) <= MAX_LENGTH_SHORT_LINK and all(
+        char in SHORT_LINK_ALPHABET for char in code
+    )
+
+
+def _recipe_ids(code):
+    from .models import Recipe
+
+    recipe_id = decode(code)
+    if recipe_id is None:
+        recipes = Recipe.objects.filter(short_link=code)
+    else:
+        recipes = Recipe.objects.filter(pk=recipe_id)
+    return recipes.values_list("pk", flat=True)
+
+
+def _lookup(code):
+    return _recipe_ids(code).first() or MISSING
+
+
+async def _alookup(code):
+    return await _recipe_ids(code).afirst() or MISSING
+
+
+def _local_timeout(recipe_id, timeout):
+    return min(
+        SHORT_LINK_LOCAL_CACHE_TIMEOUT if recipe_id
+        else SHORT_LINK_NEGATIVE_CACHE_TIMEOUT,
+        timeout,
+    )
+
+
+def resolve(code):
+    """
+    Return the id of the recipe with the short link ``code``, or None.
+
+    Results, including unknown codes, are cached in process and in the
+    shared Django cache for SHORT_LINK_CACHE_TIMEOUT seconds; unknown
+    codes only for SHORT_LINK_NEGATIVE_CACHE_TIMEOUT seconds.
+    """
+    if not _is_valid_code(code):
+        return None
+    timeout = settings.SHORT_LINK_CACHE_TIMEOUT
+    if not timeout:
+        return _lookup(code) or None
+    recipe_id = local_cache.get(code)
+    record_cache("shortlink_local", recipe_id is not None)
+    if recipe_id is None:
+        recipe_id = cache.get(CACHE_KEY_PREFIX + code)
+        record_cache("shortlink", recipe_id is not None)
+        if recipe_id is None:
+            recipe_id = _lookup(code)
+            cache.set(
+                CACHE_KEY_PREFIX + code,
+                recipe_id,
+                timeout if recipe_id else SHORT_LINK_NEGATIVE_CACHE_TIMEOUT,
+            )
+        local_cache.set(code, recipe_id, _local_timeout(recipe_id, timeout))
+    return recipe_id or None
+
+
+async def aresolve(code):
+    """Async version of ``resolve``."""
+    if not _is_valid_code(code):
+        return None
+    timeout = settings.SHORT_LINK_CACHE_TIMEOUT
+    if not timeout:
+        return await _alookup(code) or None
+    recipe_id = local_cache.get(code)
+    record_cache("shortlink_local", recipe_id is not None)
+    if recipe_id is None:
+        recipe_id = await cache.aget(CACHE_KEY_PREFIX + code)
+        record_cache("shortlink", recipe_id is not None)
+        if recipe_id is None:
+            recipe_id = await _alookup(code)
+            await cache.aset(
+                CACHE_KEY_PREFIX + code,
+                recipe_id,
+                timeout if recipe_id else SHORT_LINK_NEGATIVE_CACHE_TIMEOUT,
+            )
+        local_cache.set(code, recipe_id, _local_timeout(recipe_id, timeout))
+    return recipe_id or None
+
+
+def forget(*codes):
+    """Drop cached resolutions of the given codes."""
+    codes = [code for code in codes if code]
+    cache.delete_many([CACHE_KEY_PREFIX + code for code in codes])
+    for code in codes:
+        local_cache.delete(code)
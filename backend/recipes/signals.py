@@ -0,0 +1,109 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from favorites.models import Favorite
+from shopping_lists.models import ShoppingCart
+from users.models import User
+from . import rankings, shortlinks
+from .images import release_variants, schedule_variants
+from .models import MediaFile, Recipe, RecipeRanking
+
+IMAGE_FIELDS = {Recipe: "image", User: "avatar"}
+
+
+def _image_saved(update_fields, field_name):
+    return update_fields is None or field_name in update_fields
+
+
+@receiver(post_save, sender=Recipe)
+def create_recipe_image_variants(sender, instance, update_fields, **kwargs):
+    """Generate resized variants of the recipe image."""
+    if _image_saved(update_fields, "image"):
+        schedule_variants(instance.image)
+
+
+@receiver(post_save, sender=User)
+def create_avatar_variants(sender, instance, update_fields, **kwargs):
+    """Generate resized variants of the user avatar."""
+    if _image_saved(update_fields, "avatar"):
+        schedule_variants(instance.avatar)
+
+
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_save, sender=User)
+def remember_image_file(sender, instance, update_fields, **kwargs):
+    """Remember the stored image name before it is replaced."""
+    field_name = IMAGE_FIELDS[sender]
+    if instance.pk is None or not _image_saved(update_fields, field_name):
+        return
+    instance._previous_image_file = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list(field_name, flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=User)
+def count_image_references(sender, instance, update_fields, **kwargs):
+    """Move the image file reference from the old file to the new one."""
+    field_name = IMAGE_FIELDS[sender]
+    if not _image_saved(update_fields, field_name):
+        return
+    previous = instance.__dict__.pop("_previous_image_file", None) or None
+    current = getattr(instance, field_name).name or None
+    if previous == current:
+        return
+    if previous:
+        MediaFile.remove_reference(previous)
+        release_variants(previous)
+    if current:
+        MediaFile.add_reference(current)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=User)
+def release_image_reference(sender, instance, **kwargs):
+    """Drop the reference of a deleted object to its image file."""
+    name = getattr(instance, IMAGE_FIELDS[sender]).name
+    if name:
+        MediaFile.remove_reference(name)
+        release_variants(name)
+
+
+@receiver(post_save, sender=Recipe)
+def forget_missing_short_link(sender, instance, created, **kwargs):
+    """Drop a cached "not found" for the code of a new recipe."""
+    if created:
+        shortlinks.forget(shortlinks.encode(instance.pk))
+
+
+@receiver(post_delete, sender=Recipe)
+def forget_short_link(sender, instance, **kwargs):
+    """Stop resolving the short link of a deleted recipe."""
+    shortlinks.forget(instance.short_link, shortlinks.encode(instance.pk))
+
+
+@receiver(post_save, sender=Recipe)
+def create_ranking(sender, instance, created, **kwargs):
+    """Start a new recipe with an empty ranking."""
+    if created:
+        RecipeRanking.objects.bulk_create(
+            (RecipeRanking(recipe=instance),),
+            ignore_conflicts=True,
+        )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def rank_added_recipe(sender, instance, created, raw, **kwargs):
+    """Count an addition of the recipe to favorites or a cart."""
+    if created and not raw:
+        rankings.record(instance.user_id, (instance.recipe_id,))
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def rank_removed_recipe(sender, instance, **kwargs):
+    """Count a removal of the recipe from favorites or a cart."""
+    rankings.record(instance.user_id, (instance.recipe_id,), added=False)
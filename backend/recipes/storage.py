@@ -0,0 +1,48 @@
+import hashlib
+import os
+import posixpath
+
+from django.core.files.storage import FileSystemStorage, storages
+
+CONTENT_STORAGE_ALIAS = "content"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names files by the SHA-256 of their content.
+
+    The ``upload_to`` directory and original name are ignored: identical
+    uploads end up in the same file under ``blobs/``, so a file may be
+    shared by several objects. Files are therefore never deleted through
+    the model fields; unreferenced ones are removed by the
+    ``collect_media`` command.
+    """
+
+    prefix = "blobs"
+
+    def hashed_name(self, name, content):
+        """Return the content-addressed name for a file."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        hexdigest = digest.hexdigest()
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(
+            self.prefix,
+            hexdigest[:2],
+            f"{hexdigest}{extension}",
+        )
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            # Refresh the modification time so that a file waiting for
+            # garbage collection is kept for the new reference.
+            os.utime(self.path(name))
+            return name
+        return super()._save(name, content)
+
+
+def content_storage():
+    """Return the storage configured for uploaded images."""
+    return storages[CONTENT_STORAGE_ALIAS]
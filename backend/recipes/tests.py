@@ -0,0 +1,78 @@
+import json
+
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+from benchmarks.data import create_dataset
+from favorites.models import Favorite
+from recipes.models import RecipeRanking
+from shopping_lists.models import ShoppingCart
+from users.models import User
+
+
+class RecipeRankingTests(TestCase):
+    """Repeated additions by a user raise the trend only once."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipe_id, cls.other_id = create_dataset(
+            users=2,
+            recipes=2,
+            ingredients=2,
+            tags=1,
+            ingredients_per_recipe=1,
+        )
+        cls.user, cls.other_user = User.objects.order_by("id")
+        cls.token = Token.objects.create(user=cls.user)
+
+    def ranking(self, recipe_id):
+        return RecipeRanking.objects.get(recipe_id=recipe_id)
+
+    def test_add_remove_add(self):
+        Favorite.objects.create(user=self.user, recipe_id=self.recipe_id)
+        added = self.ranking(self.recipe_id)
+        for _ in range(3):
+            Favorite.objects.filter(
+                user=self.user,
+                recipe_id=self.recipe_id,
+            ).delete()
+            Favorite.objects.create(user=self.user, recipe_id=self.recipe_id)
+        ShoppingCart.objects.create(user=self.user, recipe_id=self.recipe_id)
+        ranking = self.ranking(self.recipe_id)
+        self.assertEqual(ranking.trending, added.trending)
+        self.assertEqual(ranking.popularity, 2)
+
+    def test_bulk_add_remove_add(self):
+        url = "/api/recipes/favorite/"
+        data = json.dumps({"recipes": [self.recipe_id, self.other_id]})
+        headers = {"Authorization": f"Token {self.token.key}"}
+        self.client.post(
+            url,
+            data,
+            content_type="application/json",
+            headers=headers,
+        )
+        added = self.ranking(self.recipe_id)
+        for method in (self.client.delete, self.client.post):
+            response = method(
+                url,
+                data,
+                content_type="application/json",
+                headers=headers,
+            )
+            self.assertEqual(response.status_code, 200)
+        ranking = self.ranking(self.recipe_id)
+        self.assertEqual(ranking.trending, added.trending)
+        self.assertEqual(ranking.popularity, 1)
+
+    def test_other_user_raises_trend(self):
+        Favorite.objects.create(user=self.user, recipe_id=self.recipe_id)
+        added = self.ranking(self.recipe_id)
+        Favorite.objects.create(
+            user=self.other_user,
+            recipe_id=self.recipe_id,
+        )
+        self.assertGreater(
+            self.ranking(self.recipe_id).trending,
+            added.trending,
+        )
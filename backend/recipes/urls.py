@@ -1,7 +1,17 @@
+from django.conf import settings
 from django.urls import path
 
-from recipes.views import shortlink_redirect_view
+from recipes.views import (
+    async_shortlink_redirect_view,
+    shortlink_redirect_view,
+)
 
 urlpatterns = [
-    path("<str:short_link>", shortlink_redirect_view, name="recipe-shortlink"),
+    path(
+        "<str:short_link>",
+        async_shortlink_redirect_view
+        if settings.ASYNC_VIEWS
+        else shortlink_redirect_view,
+        name="recipe-shortlink",
+    ),
 ]
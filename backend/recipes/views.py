@@ -1,9 +1,26 @@
+from django.conf import settings
+from django.http import Http404
 from django.shortcuts import redirect
-from rest_framework.generics import get_object_or_404
+from django.utils.cache import patch_cache_control
 
-from recipes.models import Recipe
+from recipes import shortlinks
+
+
+def _redirect(recipe_id):
+    if recipe_id is None:
+        raise Http404("No recipe matches the given short link.")
+    response = redirect(f"/recipes/{recipe_id}/")
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.SHORT_LINK_CACHE_TIMEOUT,
+    )
+    return response
 
 
 def shortlink_redirect_view(request, short_link):
-    recipe = get_object_or_404(Recipe, short_link=short_link)
-    return redirect(f"/recipes/{recipe.id}/")
+    return _redirect(shortlinks.resolve(short_link))
+
+
+async def async_shortlink_redirect_view(request, short_link):
+    return _redirect(await shortlinks.aresolve(short_link))
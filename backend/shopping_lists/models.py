@@ -9,6 +9,8 @@ class ShoppingCart(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name="in_carts",
+        # Covered by the unique (user, recipe) index.
+        db_index=False,
     )
     recipe = models.ForeignKey(
         Recipe,
@@ -6,6 +6,8 @@ class Subscription(models.Model):
         "users.User",
         on_delete=models.CASCADE,
         related_name="subscriptions",
+        # Covered by the unique (user, author) index.
+        db_index=False,
     )
     author = models.ForeignKey(
         "users.User",
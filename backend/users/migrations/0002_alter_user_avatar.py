@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-19 09:26
+
+from django.db import migrations, models
+
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="avatar",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=recipes.storage.content_storage,
+                upload_to="users/avatars/",
+            ),
+        ),
+    ]
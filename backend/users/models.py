@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
 
+from recipes.storage import content_storage
 from .constants import (
     MAX_LENGTH_EMAIL,
     MAX_LENGTH_NAME,
@@ -37,6 +38,7 @@ class User(AbstractUser):
 
     avatar = models.ImageField(
         upload_to="users/avatars/",
+        storage=content_storage,
         blank=True,
         null=True,
     )
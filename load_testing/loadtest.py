@@ -0,0 +1,521 @@
+"""
+Load generator for the Foodgram API.
+
+Requests are taken from the Postman collection in ``postman_collection``
+and replayed as user journeys by a pool of concurrent virtual users.
+Throughput and p50/p95/p99 latency are reported per collection request.
+"""
+
+import argparse
+import json
+import random
+import re
+import string
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_COLLECTION = (
+    BASE_DIR / "postman_collection" / "foodgram.postman_collection.json"
+)
+VARIABLE_RE = re.compile(r"{{\s*(\w+)\s*}}")
+PERCENTILES = (50, 95, 99)
+
+# Journey name -> (weight, steps). A step is the name of a request in the
+# collection and a flag telling whether it is sent with the user's token.
+JOURNEYS = {
+    "browse_anonymous": (
+        30,
+        (
+            ("get_recipes_list // No Auth", False),
+            ("get_recipes_list_with_two_tags_param // User", False),
+            ("get_recipe_detail // No Auth", False),
+            ("get_tag_list // No Auth", False),
+            ("get_ingredients_list_with_name_filter // User", False),
+        ),
+    ),
+    "browse_user": (
+        25,
+        (
+            ("get_recipes_list // User", True),
+            ("get_recipes_list_with_author_param // User", True),
+            ("get_recipe_detail // User", True),
+            ("get_recipe_short_link // User", True),
+        ),
+    ),
+    "favorite": (
+        15,
+        (
+            ("add_to_favorite // User", True),
+            ("get_recipes_list_with_is_favorited_param // User", True),
+            ("remove_from_favorite // User", True),
+        ),
+    ),
+    "shopping_cart": (
+        15,
+        (
+            ("add_to_shopping_cart // User", True),
+            ("get_recipes_list_with_is_in_shopping_cart_param // User", True),
+            ("download_shopping_cart // User", True),
+            ("remove_from_shopping_cart // User", True),
+        ),
+    ),
+    "subscriptions": (
+        15,
+        (
+            ("create_subscription // User", True),
+            ("get_subscription_list // User", True),
+            ("get_subscription_list_with_recipes_limit_param // User", True),
+            ("delete_first_subscription // User", True),
+        ),
+    ),
+}
+
+
+class Collection:
+    """Flattened view of the Postman collection requests."""
+
+    def __init__(self, path):
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        self.variables = {
+            variable["key"]: variable["value"]
+            for variable in data.get("variable", [])
+        }
+        self.requests = {}
+        self._collect(data["item"])
+
+    def _collect(self, items):
+        for item in items:
+            if "item" in item:
+                self._collect(item["item"])
+                continue
+            name = " ".join(item["name"].split())
+            self.requests.setdefault(name, item["request"])
+
+    def render(self, name, variables):
+        """Return method, url and body of a request with variables set."""
+        try:
+            request = self.requests[name]
+        except KeyError:
+            raise KeyError(f"Request {name!r} is not in the collection.")
+        url = request["url"]
+        if isinstance(url, dict):
+            url = url["raw"]
+        body = request.get("body", {}).get("raw") or None
+        return (
+            request["method"],
+            _substitute(url, variables),
+            _substitute(body, variables) if body else None,
+        )
+
+
+def _substitute(text, variables):
+    def replace(match):
+        key = match.group(1)
+        if key not in variables:
+            raise KeyError(f"Variable {key!r} is not set.")
+        return str(variables[key])
+
+    return VARIABLE_RE.sub(replace, text)
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    rank = max(int(round(percent / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class Stats:
+    """Thread-safe latency and status accounting per request name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.started = None
+        self.finished = None
+
+    def record(self, name, elapsed, ok):
+        with self._lock:
+            self.latencies[name].append(elapsed)
+            if not ok:
+                self.errors[name] += 1
+
+    def summary(self):
+        """Return per-request statistics, latencies in milliseconds."""
+        duration = (self.finished or time.perf_counter()) - self.started
+        result = {}
+        for name, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            row = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "rps": len(values) / duration if duration else 0.0,
+            }
+            for percent in PERCENTILES:
+                row[f"p{percent}"] = percentile(values, percent) * 1000
+            result[name] = row
+        total = sorted(
+            value for values in self.latencies.values() for value in values
+        )
+        result["TOTAL"] = {
+            "requests": len(total),
+            "errors": sum(self.errors.values()),
+            "rps": len(total) / duration if duration else 0.0,
+            **{
+                f"p{percent}": percentile(total, percent) * 1000
+                for percent in PERCENTILES
+            },
+        }
+        return result
+
+
+class VirtualUser:
+    """A registered user replaying journeys with its own HTTP session."""
+
+    def __init__(self, runner, index):
+        self.runner = runner
+        self.session = requests.Session()
+        self.token = None
+        self.user_id = None
+        suffix = f"{runner.run_id}-{index}"
+        self.variables = dict(runner.collection.variables)
+        self.variables.update(
+            {
+                "email": json.dumps(f"load-{suffix}@example.com"),
+                "username": json.dumps(f"load-{suffix}"),
+                "password": json.dumps(runner.password),
+            },
+        )
+
+    def send(self, name, authenticated, record=True, **variables):
+        """Send a collection request and record its latency."""
+        context = {**self.variables, **variables}
+        method, url, body = self.runner.collection.render(name, context)
+        headers = {"Content-Type": "application/json"}
+        if authenticated and self.token:
+            headers["Authorization"] = f"Token {self.token}"
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method,
+                url,
+                data=body.encode("utf-8") if body else None,
+                headers=headers,
+                timeout=self.runner.timeout,
+            )
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response = None
+            ok = False
+        if record:
+            self.runner.stats.record(
+                name,
+                time.perf_counter() - started,
+                ok,
+            )
+        return response
+
+    def register(self):
+        response = self.send("create_first_user", False, record=False)
+        if response is None or response.status_code != 201:
+            raise RuntimeError(_describe("register user", response))
+        self.user_id = response.json()["id"]
+        response = self.send("get_token_for_first_user", False, record=False)
+        if response is None or response.status_code != 200:
+            raise RuntimeError(_describe("obtain token", response))
+        self.token = response.json()["auth_token"]
+
+    def create_recipe(self, ingredients, tags):
+        first, second = random.sample(ingredients, 2)
+        first_tag, second_tag = random.sample(tags, 2)
+        response = self.send(
+            "create_first_recipe // Second User",
+            True,
+            record=False,
+            firstIndredientId=first["id"],
+            secondIndredientId=second["id"],
+            firstTagId=first_tag["id"],
+            secondTagId=second_tag["id"],
+        )
+        if response is None or response.status_code != 201:
+            raise RuntimeError(_describe("create recipe", response))
+        return response.json()["id"]
+
+    def run_journey(self, steps):
+        runner = self.runner
+        first_tag, second_tag = random.sample(runner.tags, 2)
+        authors = [
+            user_id for user_id in runner.user_ids if user_id != self.user_id
+        ] or runner.user_ids
+        variables = {
+            "firstRecipeId": random.choice(runner.recipe_ids),
+            "userId": random.choice(runner.user_ids),
+            "thirdUserId": random.choice(authors),
+            "secondTagSlug": first_tag["slug"],
+            "thirdTagSlug": second_tag["slug"],
+            "ingredientNameFirstLatter": random.choice(runner.letters),
+        }
+        for name, authenticated in steps:
+            self.send(name, authenticated, **variables)
+
+
+class LoadTest:
+    """Prepare fixtures through the API and run journeys concurrently."""
+
+    def __init__(self, options):
+        self.options = options
+        self.collection = Collection(options.collection)
+        if options.base_url:
+            self.collection.variables["baseUrl"] = options.base_url.rstrip("/")
+        self.timeout = options.timeout
+        self.run_id = "".join(
+            random.choices(string.ascii_lowercase + string.digits, k=8),
+        )
+        self.password = f"Qx7!{self.run_id[::-1]}#mRz"
+        self.stats = Stats()
+        self.users = []
+        self.user_ids = []
+        self.recipe_ids = []
+        self.tags = []
+        self.letters = []
+        self.journeys = [
+            name
+            for name in (options.journeys or JOURNEYS)
+            if JOURNEYS[name][0] > 0
+        ]
+
+    def prepare(self):
+        """Register users and create the recipes the journeys work with."""
+        anonymous = VirtualUser(self, "setup")
+        base_url = self.collection.variables["baseUrl"]
+        self.tags = anonymous.session.get(
+            f"{base_url}/api/tags/",
+            timeout=self.timeout,
+        ).json()
+        ingredients = anonymous.session.get(
+            f"{base_url}/api/ingredients/",
+            timeout=self.timeout,
+        ).json()
+        if len(self.tags) < 2 or len(ingredients) < 2:
+            raise RuntimeError(
+                "At least 2 tags and 2 ingredients are required.",
+            )
+        self.letters = sorted(
+            {ingredient["name"][0] for ingredient in ingredients},
+        )
+        for index in range(self.options.concurrency):
+            user = VirtualUser(self, index)
+            user.register()
+            self.users.append(user)
+            self.user_ids.append(user.user_id)
+        for user in self.users[: self.options.authors]:
+            for _ in range(self.options.recipes_per_author):
+                self.recipe_ids.append(
+                    user.create_recipe(ingredients, self.tags),
+                )
+
+    def _worker(self, user, deadline, iterations):
+        weights = [JOURNEYS[name][0] for name in self.journeys]
+        done = 0
+        while time.perf_counter() < deadline and (
+            iterations is None or done < iterations
+        ):
+            name = random.choices(self.journeys, weights)[0]
+            user.run_journey(JOURNEYS[name][1])
+            done += 1
+
+    def run(self):
+        if self.options.warmup:
+            self._run_workers(self.options.warmup, None)
+            self.stats = Stats()
+        self._run_workers(self.options.duration, self.options.iterations)
+        return self.stats.summary()
+
+    def _run_workers(self, duration, iterations):
+        self.stats.started = time.perf_counter()
+        deadline = self.stats.started + duration
+        with ThreadPoolExecutor(max_workers=len(self.users)) as executor:
+            futures = [
+                executor.submit(self._worker, user, deadline, iterations)
+                for user in self.users
+            ]
+            for future in futures:
+                future.result()
+        self.stats.finished = time.perf_counter()
+
+    def cleanup(self):
+        """Delete the recipes created for the run."""
+        owners = self.users[: self.options.authors]
+        per_author = self.options.recipes_per_author
+        for index, recipe_id in enumerate(self.recipe_ids):
+            owners[index // per_author].send(
+                "delete_first_recipe // Second User",
+                True,
+                record=False,
+                firstRecipeId=recipe_id,
+            )
+
+
+def _describe(action, response):
+    if response is None:
+        return f"Could not {action}: no response."
+    return (
+        f"Could not {action}: {response.status_code} "
+        f"{response.text[:200]}"
+    )
+
+
+def format_report(summary, baseline=None):
+    """Return the summary as a text table, optionally with deltas."""
+    header = (
+        f"{'request':<58} {'count':>7} {'err':>5} {'rps':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    if baseline:
+        header += f" {'rps Δ%':>8} {'p95 Δ%':>8}"
+    lines = [header, "-" * len(header)]
+    for name, row in summary.items():
+        line = (
+            f"{name[:58]:<58} {row['requests']:>7} {row['errors']:>5} "
+            f"{row['rps']:>8.1f} {row['p50']:>8.1f} {row['p95']:>8.1f} "
+            f"{row['p99']:>8.1f}"
+        )
+        if baseline:
+            line += " " + " ".join(
+                f"{_delta(row, baseline.get(name), key):>8}"
+                for key in ("rps", "p95")
+            )
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _delta(row, previous, key):
+    if not previous or not previous.get(key):
+        return "-"
+    return f"{(row[key] - previous[key]) / previous[key] * 100:+.1f}"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "--base-url",
+        help="Server address, defaults to the collection baseUrl.",
+    )
+    parser.add_argument(
+        "--collection",
+        default=DEFAULT_COLLECTION,
+        help="Path to the Postman collection.",
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=10,
+        help="Number of concurrent virtual users.",
+    )
+    parser.add_argument(
+        "-d",
+        "--duration",
+        type=float,
+        default=30,
+        help="Measured run duration in seconds.",
+    )
+    parser.add_argument(
+        "-n",
+        "--iterations",
+        type=int,
+        help="Stop each virtual user after this many journeys.",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=5,
+        help="Unmeasured warmup duration in seconds.",
+    )
+    parser.add_argument(
+        "--authors",
+        type=int,
+        default=3,
+        help="Number of virtual users that publish recipes.",
+    )
+    parser.add_argument(
+        "--recipes-per-author",
+        type=int,
+        default=5,
+        help="Recipes created by every author before the run.",
+    )
+    parser.add_argument(
+        "--journey",
+        dest="journeys",
+        action="append",
+        choices=sorted(JOURNEYS),
+        help="Run only the given journey; may be repeated.",
+    )
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, help="Random seed.")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Write the summary as JSON to this file.",
+    )
+    parser.add_argument(
+        "--baseline",
+        help="JSON summary of a previous run to compare against.",
+    )
+    parser.add_argument(
+        "--keep-data",
+        action="store_true",
+        help="Do not delete the recipes created for the run.",
+    )
+    options = parser.parse_args(argv)
+    options.authors = max(1, min(options.authors, options.concurrency))
+    return options
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    if options.seed is not None:
+        random.seed(options.seed)
+    load_test = LoadTest(options)
+    try:
+        load_test.prepare()
+    except (RuntimeError, requests.RequestException) as error:
+        sys.exit(str(error))
+    try:
+        summary = load_test.run()
+    finally:
+        if not options.keep_data:
+            load_test.cleanup()
+    baseline = None
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["summary"]
+    print(format_report(summary, baseline))
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "base_url": load_test.collection.variables["baseUrl"],
+                    "concurrency": options.concurrency,
+                    "duration": options.duration,
+                    "journeys": load_test.journeys,
+                    "summary": summary,
+                },
+                file,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()